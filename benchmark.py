@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from main import run, DEFAULT_PARAMETERS
+from run_experiments import get_input_files
+from startup_time import create_startup_report, print_startup_report
+
+
+# Phases timed on each run: (name, key of the solution data). The total is 
+# the time of the whole run, including the output
+PHASES = [
+    ("read", "read_time"),
+    ("preprocessing", "preprocessing_time"),
+    ("bounds", "bounds_time"),
+    ("coverage", "coverage_time"),
+    ("build", "build_time"),
+    ("optimize", "opt_time"),
+    ("callback", "cb_total_time"),
+    ("subproblems", "subproblems_time"),
+    ("output", "output_time"),
+]
+
+# Solution methods (code : name)
+METHODS = {0: "standard", 1: "benders"}
+
+# Default directories of the instances of the benchmark
+DEFAULT_INSTANCES_DIRS = ["toy_instances", "instances_experiments"]
+
+
+def time_run(input_file, code, params):
+    '''Run a solution method on an instance on a temporary output directory. Returns a tuple (times, objective), where times is a dictionary {phase : time (seconds)} with the time of each phase of PHASES and the total time.'''
+    with tempfile.TemporaryDirectory() as output_directory:
+        s = time.time()
+        sol_dict = run([input_file, output_directory, code], params)
+        wall_time = time.time() - s
+
+    times = {
+        phase : sol_dict.get(key, 0) or 0
+        for phase, key in PHASES
+    }
+    times["total"] = wall_time
+    return (times, sol_dict.get("objective"))
+
+
+def summarize(samples):
+    '''Returns a dictionary with the median, the variance, the minimum and the maximum of a list of samples'''
+    return {
+        "median": statistics.median(samples),
+        "variance": statistics.variance(samples) if (len(samples) > 1) else 0,
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+
+def run_benchmark(input_files, codes, repeats, params):
+    '''Run each solution method on each instance repeats times. Returns a dictionary {instance/method : result}, where a result has the objective of the last run and the summary (see summarize) of the times of each phase.'''
+    results = {}
+    for input_file in input_files:
+        for code in codes:
+            name = os.path.basename(input_file) + "/" + METHODS[code]
+            samples = {phase : [] for phase, key in PHASES + [("total", "")]}
+            objective = None
+            for k in range(repeats):
+                times, objective = time_run(input_file, code, params)
+                for phase in samples.keys():
+                    samples[phase].append(times[phase])
+            results[name] = {
+                "objective": objective,
+                "phases": {
+                    phase : summarize(phase_samples)
+                    for phase, phase_samples in samples.items()
+                }
+            }
+            print(
+                name,
+                "objective:", objective,
+                "total: %.3f s" % results[name]["phases"]["total"]["median"]
+            )
+    return results
+
+
+def compare_with_baseline(results, baseline, max_slowdown, min_difference):
+    '''Returns the list of regressions [name, phase, baseline median, median] of the phases whose median is more than max_slowdown (a fraction) slower than the median of the baseline. Differences smaller than min_difference (seconds) are ignored, since the short phases are noisy.'''
+    regressions = []
+    for name, result in results.items():
+        if (name not in baseline):
+            continue
+        for phase, summary in result["phases"].items():
+            if (phase not in baseline[name]["phases"]):
+                continue
+            baseline_median = baseline[name]["phases"][phase]["median"]
+            median = summary["median"]
+            if (
+                median > baseline_median * (1 + max_slowdown)
+                and median - baseline_median > min_difference
+            ):
+                regressions.append([name, phase, baseline_median, median])
+    return regressions
+
+
+def print_results(results):
+    '''Print the median and the standard deviation of the time of each phase of each instance and method'''
+    phases = [phase for phase, key in PHASES] + ["total"]
+    print("%-32s" % "instance/method" + "".join("%16s" % p for p in phases))
+    for name, result in results.items():
+        print("%-32s" % name[-32:] + "".join(
+            "%9.3f±%-6.3f" % (
+                result["phases"][phase]["median"],
+                result["phases"][phase]["variance"] ** 0.5
+            )
+            for phase in phases
+        ))
+
+
+def create_parser():
+    '''Returns the parser of the arguments of the benchmark'''
+    parser = argparse.ArgumentParser(
+        description="Time the phases of the solution methods."
+    )
+    parser.add_argument(
+        "instances_dirs", nargs="*", default=DEFAULT_INSTANCES_DIRS,
+        help="directories of the instances (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--methods", type=int, nargs="+", default=[0, 1],
+        help="solution methods: 0 - standard, 1 - benders (default: 0 1)"
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=3,
+        help="number of runs of each instance and method (default: 3)"
+    )
+    parser.add_argument(
+        "--time-limit", type=float, default=60,
+        help="time limit (seconds) of each run (default: 60)"
+    )
+    parser.add_argument(
+        "--params", type=json.loads, default={},
+        help="json with parameters of main.DEFAULT_PARAMETERS to change"
+    )
+    parser.add_argument(
+        "--output", default="",
+        help="json file where the results are written"
+    )
+    parser.add_argument(
+        "--baseline", default="",
+        help="json file with the results of a previous benchmark"
+    )
+    parser.add_argument(
+        "--max-slowdown", type=float, default=0.2,
+        help="fraction of slowdown of a phase over the baseline that fails "
+        + "the benchmark (default: 0.2)"
+    )
+    parser.add_argument(
+        "--min-difference", type=float, default=0.05,
+        help="slowdowns smaller than this (seconds) are ignored "
+        + "(default: 0.05)"
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    args = create_parser().parse_args()
+
+    params = DEFAULT_PARAMETERS | {
+        "time_limit": args.time_limit,
+        "render_backend": "none"
+    } | args.params
+
+    # Time to import the entry point, measured on a new process
+    startup_report = create_startup_report()
+    print_startup_report(startup_report)
+
+    # The solver stack is imported before the runs, so its import time is
+    # not counted on the first run
+    import models_manager
+
+    input_files = []
+    for instances_dir in args.instances_dirs:
+        input_files += get_input_files(instances_dir)
+
+    results = run_benchmark(input_files, args.methods, args.repeats, params)
+    print_results(results)
+
+    if (args.output != ""):
+        with open(args.output, "w") as output:
+            json.dump(
+                {
+                    "params": params,
+                    "startup": startup_report,
+                    "results": results
+                },
+                output,
+                indent=2
+            )
+
+    if (args.baseline != ""):
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_with_baseline(
+            results,
+            baseline["results"],
+            args.max_slowdown,
+            args.min_difference
+        )
+        startup_budget = baseline.get("startup", {}).get("import_time")
+        if (
+            startup_budget is not None
+            and startup_report["import_time"]
+            > startup_budget * (1 + args.max_slowdown) + args.min_difference
+        ):
+            regressions.append([
+                "startup",
+                "import",
+                startup_budget,
+                startup_report["import_time"]
+            ])
+        for name, phase, baseline_median, median in regressions:
+            print(
+                "SLOWDOWN", name, phase,
+                "%.3f s -> %.3f s" % (baseline_median, median)
+            )
+        if (len(regressions) > 0 or not startup_report["within_budget"]):
+            sys.exit(1)
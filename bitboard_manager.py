@@ -0,0 +1,224 @@
+import time
+from patterns_manager import create_placement_points
+
+
+# Number of nodes explored between two checks of the time limit
+NODES_BETWEEN_TIME_CHECKS = 100
+
+# Maximum number of points of a bin solved by the search. On larger bins the
+# wasted area bound is weak and the search is slower than the cpsat backend
+MAX_BIN_POINTS = 30 * 30
+
+
+def get_cell_bit(r, s, bin_width):
+    '''Returns the index of the bit of the point (r,s) on the bin occupation mask. The bits are ordered by row (s) and then by column (r).'''
+    return s * bin_width + r
+
+
+def create_item_masks(width, height, x_points, y_points, bin_width):
+    '''Returns a tuple (item mask, anchors mask), where item mask is the mask of the points cutted by an item width x height with left bottom on the point (0,0) and anchors mask is the mask of the points (l,w), with l on x_points and w on y_points, where the left bottom of the item can be placed'''
+    row_mask = (1 << width) - 1
+    item_mask = 0
+    for k in range(height):
+        item_mask |= row_mask << (k * bin_width)
+
+    anchors_mask = 0
+    for l in x_points:
+        for w in y_points:
+            anchors_mask |= 1 << get_cell_bit(l, w, bin_width)
+    return (item_mask, anchors_mask)
+
+
+def shift_and(mask, length, step):
+    '''Returns the AND of mask >> (k * step) for k = 0, ..., length - 1, computed with O(log length) shifts. Bit b is set if the bits b, b + step, ..., b + (length - 1) * step are set on mask.'''
+    result = mask
+    covered = 1
+    while (2 * covered <= length):
+        result &= result >> (covered * step)
+        covered *= 2
+    if (covered < length):
+        result &= result >> ((length - covered) * step)
+    return result
+
+
+def shift_or(mask, length, step):
+    '''Returns the OR of mask << (k * step) for k = 0, ..., length - 1, computed with O(log length) shifts'''
+    result = mask
+    covered = 1
+    while (2 * covered <= length):
+        result |= result << (covered * step)
+        covered *= 2
+    if (covered < length):
+        result |= result << ((length - covered) * step)
+    return result
+
+
+def check_bin_points(bin_height, bin_width):
+    '''Raise a ValueError if the bin has more than MAX_BIN_POINTS points'''
+    if (bin_width * bin_height > MAX_BIN_POINTS):
+        raise ValueError(
+            "the bitboard backend solves bins up to "
+            + str(MAX_BIN_POINTS) + " points, use the cpsat or mip backend"
+        )
+
+
+def solve_subproblem_bitboard(
+    j,
+    items,
+    bin_height,
+    bin_width,
+    coverage,
+    time_limit,
+    manager=None
+):
+    '''Solve the subproblem of bin j with a depth first search over the bin occupation, stored as an integer bitmask. On each node, the first free point (lowest row, then leftmost column) is either the left bottom of an item or left empty, so every packing is enumerated once. Identical items (and the copies of an item) are grouped in types, so their permutations are not enumerated, and the states (occupation, remaining items) already proven infeasible are memoized.
+
+    The left bottom of each type is restricted to its normal patterns. On each node, the points where each remaining type fits are computed with shifts of the free mask. A node is pruned if a remaining type does not fit anywhere, and the free points that no remaining type can cover are wasted: they are filled, and the node is pruned if the area of the remaining items is larger than the free area left. On the subproblems of the Benders callback with bins up to 30 x 30 points (after the preprocessing), most verdicts take less than a millisecond, faster than the cpsat backend, but infeasible subproblems with many small items may take seconds. Bins with more than MAX_BIN_POINTS points are refused with a ValueError. The parameters coverage and manager are not used, they are kept to follow the interface of the subproblem backends. Returns a tuple (feasible, placement) as solve_subproblem_j.'''
+    check_bin_points(bin_height, bin_width)
+    deadline = time.time() + time_limit
+
+    # Group identical items in types (width, height), largest first. Each 
+    # item id is repeated by its demand
+    items_of_type = {}
+    for i, item in items.items():
+        if (item["width"] > bin_width or item["height"] > bin_height):
+            return (False, [])
+        dimensions = (item["width"], item["height"])
+        if (dimensions not in items_of_type):
+            items_of_type[dimensions] = []
+        items_of_type[dimensions] += [i] * item["demand"]
+    types = sorted(
+        items_of_type.keys(),
+        key=lambda dimensions: (dimensions[0] * dimensions[1], dimensions),
+        reverse=True
+    )
+    areas = [width * height for width, height in types]
+    # There is a packing with the left bottom of every item on its normal 
+    # patterns, so the other points are never the left bottom of an item
+    placement_points = create_placement_points(
+        items, 
+        bin_width, 
+        bin_height, 
+        "normal_patterns"
+    )
+    item_masks, anchors_masks = zip(*[
+        create_item_masks(
+            width, 
+            height, 
+            placement_points["x"][items_of_type[width, height][0]],
+            placement_points["y"][items_of_type[width, height][0]],
+            bin_width
+        )
+        for width, height in types
+    ])
+
+    full_mask = (1 << (bin_width * bin_height)) - 1
+    initial_counts = tuple(len(items_of_type[t]) for t in types)
+    initial_area = sum(
+        area * count for area, count in zip(areas, initial_counts)
+    )
+
+    def get_moves(occupied, counts, area):
+        '''Returns a tuple (occupied, moves), where occupied is the occupation with the wasted points filled and moves are the moves (type, bit, new occupied) from the state. The type is None if the first free point is left empty. Returns (occupied, None) if the state is proven infeasible.'''
+        free = ~occupied & full_mask
+        # Points where each remaining type fits, and the free points that
+        # are covered by at least one of them
+        anchors = {}
+        covered = 0
+        runs = {}
+        for t, count in enumerate(counts):
+            if (count == 0):
+                continue
+            width, height = types[t]
+            if (width not in runs):
+                runs[width] = shift_and(free, width, 1)
+            anchors[t] = shift_and(runs[width], height, bin_width)
+            anchors[t] &= anchors_masks[t]
+            if (anchors[t] == 0):
+                return (occupied, None)
+            covered |= shift_or(
+                shift_or(anchors[t], width, 1),
+                height,
+                bin_width
+            )
+
+        wasted = free & ~covered
+        if (area > free.bit_count() - wasted.bit_count()):
+            return (occupied, None)
+        occupied |= wasted
+        free &= covered
+
+        first_free = free & -free
+        b = first_free.bit_length() - 1
+        moves = []
+        for t in anchors.keys():
+            if ((anchors[t] >> b) & 1):
+                moves.append((t, b, occupied | (item_masks[t] << b)))
+        moves.append((None, b, occupied | first_free))
+        return (occupied, moves)
+
+    # States (occupied, counts) proven infeasible
+    failed = set()
+    # Each frame of the stack is [occupied, counts, remaining area, moves,
+    # index of the next move]
+    stack = [[0, initial_counts, initial_area, None, 0]]
+    # Moves (type, bit) that lead to the current frame
+    path = []
+    nodes = 0
+
+    while (len(stack) > 0):
+        frame = stack[-1]
+        occupied, counts, area, moves, next_move = frame
+
+        if (moves is None):
+            nodes += 1
+            if (nodes % NODES_BETWEEN_TIME_CHECKS == 0):
+                if (time.time() > deadline):
+                    return (None, [])
+
+            if (area == 0):
+                break
+
+            if ((occupied, counts) not in failed):
+                occupied, moves = get_moves(occupied, counts, area)
+            if (moves is None or (occupied, counts) in failed):
+                failed.add((frame[0], counts))
+                stack.pop()
+                if (len(path) > 0):
+                    path.pop()
+                continue
+
+            frame[0] = occupied
+            frame[3] = moves
+
+        if (next_move >= len(moves)):
+            failed.add((occupied, counts))
+            stack.pop()
+            if (len(path) > 0):
+                path.pop()
+            continue
+
+        frame[4] += 1
+        t, b, new_occupied = moves[next_move]
+        new_counts = counts
+        new_area = area
+        if (t is not None):
+            new_counts = counts[:t] + (counts[t] - 1,) + counts[t+1:]
+            new_area = area - areas[t]
+        path.append((t, b))
+        stack.append([new_occupied, new_counts, new_area, None, 0])
+
+    if (len(stack) == 0):
+        return (False, [])
+
+    # Give the positions of each type to its items
+    placement = []
+    next_item_of_type = [0] * len(types)
+    for t, b in path:
+        if (t is None):
+            continue
+        i = items_of_type[types[t]][next_item_of_type[t]]
+        next_item_of_type[t] += 1
+        placement.append((i, b % bin_width, b // bin_width))
+
+    return (True, placement)
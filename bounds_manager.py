@@ -0,0 +1,274 @@
+import math
+
+
+# Largest k used on the dual feasible functions u^(k)
+MAX_DFF_K = 8
+
+################################################################################
+# Dual feasible functions starts below
+################################################################################
+
+def create_dual_feasible_functions(dimensions, capacity):
+    '''Returns a list of integer dual feasible functions for a capacity. A function f is dual feasible if, for any set of values with sum <= capacity, the sum of f(value) is <= f(capacity). The candidates are the identity, the functions u^(k) of Fekete and Schepers and the functions f_0 of Carlier, Clautiaux and Moukrim with the parameter taken from the dimensions.'''
+
+    def identity(x):
+        return x
+
+    def create_u_k(k):
+        # u^(k) multiplied by k to keep integer values
+        def u_k(x):
+            if (((k + 1) * x) % capacity == 0):
+                return x * k
+            return ((k + 1) * x // capacity) * capacity
+        return u_k
+
+    def create_f_0(epsilon):
+        def f_0(x):
+            if (x > capacity - epsilon):
+                return capacity
+            if (x < epsilon):
+                return 0
+            return x
+        return f_0
+
+    functions = [identity]
+    for k in range(1, MAX_DFF_K + 1):
+        functions.append(create_u_k(k))
+    for epsilon in sorted(set(dimensions)):
+        if (1 < epsilon <= capacity // 2):
+            functions.append(create_f_0(epsilon))
+
+    return functions
+
+################################################################################
+# One-dimensional bounds starts below
+################################################################################
+
+def calculate_1d_lower_bound(sizes, capacity):
+    '''Martello and Toth L2 bound for the one-dimensional bin packing problem. sizes is a dictionary {size : number of copies}. Returns the lower bound on the number of bins of the given capacity needed to pack all copies.'''
+    if (len(sizes) == 0):
+        return 0
+
+    # If a size is larger than the capacity, then there is no packing
+    if (max(sizes.keys()) > capacity):
+        return math.inf
+
+    best = math.ceil(
+        sum(size * copies for size, copies in sizes.items()) / capacity
+    )
+    alphas = {0} | {size for size in sizes.keys() if (size <= capacity // 2)}
+
+    for alpha in alphas:
+        # J1: sizes that can not share a bin with any size >= alpha
+        # J2: sizes larger than half of the capacity, not in J1
+        # J3: sizes between alpha and half of the capacity
+        count_j1 = 0
+        count_j2 = 0
+        sum_j2 = 0
+        sum_j3 = 0
+        for size, copies in sizes.items():
+            if (size > capacity - alpha):
+                count_j1 += copies
+            elif (size > capacity / 2):
+                count_j2 += copies
+                sum_j2 += size * copies
+            elif (size >= alpha):
+                sum_j3 += size * copies
+        free_space_j2 = count_j2 * capacity - sum_j2
+        bound = (
+            count_j1
+            + count_j2
+            + max(0, math.ceil((sum_j3 - free_space_j2) / capacity))
+        )
+        best = max(best, bound)
+
+    return best
+
+################################################################################
+# Infeasibility filters of one bin starts below
+################################################################################
+
+def items_do_not_fit(items, bin_width, bin_height):
+    '''True, if an item is larger than the bin or if two items can not be placed neither side by side nor one above the other'''
+    items_list = list(items.values())
+    for n, item in enumerate(items_list):
+        if (item["width"] > bin_width or item["height"] > bin_height):
+            return True
+        for other in items_list[n+1:]:
+            if (
+                item["width"] + other["width"] > bin_width
+                and item["height"] + other["height"] > bin_height
+            ):
+                return True
+    return False
+
+
+def strip_relaxation_is_infeasible(items, bin_width, bin_height):
+    '''True, if the one-dimensional relaxation proves that the items do not fit on the bin. Each item is sliced in rows of height 1, and the rows of the bin are bins of capacity bin_width (and the same for the columns).'''
+    rows = {}
+    columns = {}
+    for item in items.values():
+        rows[item["width"]] = rows.get(item["width"], 0) + item["height"]
+        columns[item["height"]] = (
+            columns.get(item["height"], 0) + item["width"]
+        )
+    return (
+        calculate_1d_lower_bound(rows, bin_width) > bin_height
+        or calculate_1d_lower_bound(columns, bin_height) > bin_width
+    )
+
+
+def dff_area_is_infeasible(items, bin_width, bin_height):
+    '''True, if the area of the items, transformed by a pair of dual feasible functions, is larger than the area of the bin transformed by the same functions'''
+    widths_functions = create_dual_feasible_functions(
+        [item["width"] for item in items.values()],
+        bin_width
+    )
+    heights_functions = create_dual_feasible_functions(
+        [item["height"] for item in items.values()],
+        bin_height
+    )
+
+    for f in widths_functions:
+        widths = [f(item["width"]) for item in items.values()]
+        for g in heights_functions:
+            area = sum(
+                width * g(item["height"])
+                for width, item in zip(widths, items.values())
+            )
+            if (area > f(bin_width) * g(bin_height)):
+                return True
+
+    return False
+
+
+# Filters in the order they are tried
+INFEASIBILITY_FILTERS = [
+    items_do_not_fit,
+    strip_relaxation_is_infeasible,
+    dff_area_is_infeasible,
+]
+
+
+def bin_is_infeasible(items, bin_width, bin_height):
+    '''True, if one of the filters proves that the items do not fit on one bin. If False, nothing can be said.'''
+    for infeasibility_filter in INFEASIBILITY_FILTERS:
+        if (infeasibility_filter(items, bin_width, bin_height)):
+            return True
+    return False
+
+################################################################################
+# Lower bounds of the number of bins starts below
+################################################################################
+
+def calculate_area_lower_bound(items, bin_width, bin_height):
+    '''Continuous lower bound: the sum of the areas of the items divided by the area of the bin'''
+    area = sum(item["width"] * item["height"] for item in items.values())
+    return math.ceil(area / (bin_width * bin_height))
+
+
+def calculate_l1_lower_bound(items, bin_width, bin_height):
+    '''Martello and Vigo L1 bound. Items higher than half of the bin can not be placed one above the other, so their widths are a one-dimensional bin packing problem (and the same for the items wider than half of the bin)'''
+    widths = {}
+    heights = {}
+    for item in items.values():
+        if (item["height"] > bin_height / 2):
+            widths[item["width"]] = widths.get(item["width"], 0) + 1
+        if (item["width"] > bin_width / 2):
+            heights[item["height"]] = heights.get(item["height"], 0) + 1
+    return max(
+        calculate_1d_lower_bound(widths, bin_width),
+        calculate_1d_lower_bound(heights, bin_height)
+    )
+
+
+def calculate_l2_lower_bound(items, bin_width, bin_height):
+    '''Martello and Vigo L2 bound. For each pair (p,q), the items larger than (bin_width - p, bin_height - q) and the items larger than half of the bin need one bin each, and the items with dimensions between (p,q) and half of the bin can only use the free area of the bins of the second group'''
+    bin_area = bin_width * bin_height
+    p_values = {
+        item["width"] 
+        for item in items.values() 
+        if (item["width"] <= bin_width / 2)
+    } | {1}
+    q_values = {
+        item["height"] 
+        for item in items.values() 
+        if (item["height"] <= bin_height / 2)
+    } | {1}
+
+    best = 0
+    for p in p_values:
+        for q in q_values:
+            # I1: items that can not share a bin with an item of I3
+            # I2: items larger than half of the bin, not in I1
+            # I3: items between (p,q) and half of the bin
+            count_i1 = 0
+            count_i2 = 0
+            area_i2 = 0
+            area_i3 = 0
+            for item in items.values():
+                width = item["width"]
+                height = item["height"]
+                if (width > bin_width - p and height > bin_height - q):
+                    count_i1 += 1
+                elif (width > bin_width / 2 and height > bin_height / 2):
+                    count_i2 += 1
+                    area_i2 += width * height
+                elif (
+                    p <= width <= bin_width / 2 
+                    and q <= height <= bin_height / 2
+                ):
+                    area_i3 += width * height
+            free_area_i2 = count_i2 * bin_area - area_i2
+            bound = (
+                count_i1
+                + count_i2
+                + max(0, math.ceil((area_i3 - free_area_i2) / bin_area))
+            )
+            best = max(best, bound)
+
+    return best
+
+
+def calculate_dff_lower_bound(items, bin_width, bin_height):
+    '''Area bound with the dimensions transformed by each pair of dual feasible functions'''
+    widths_functions = create_dual_feasible_functions(
+        [item["width"] for item in items.values()],
+        bin_width
+    )
+    heights_functions = create_dual_feasible_functions(
+        [item["height"] for item in items.values()],
+        bin_height
+    )
+
+    best = 0
+    for f in widths_functions:
+        widths = [f(item["width"]) for item in items.values()]
+        for g in heights_functions:
+            bin_area = f(bin_width) * g(bin_height)
+            if (bin_area <= 0):
+                continue
+            area = sum(
+                width * g(item["height"])
+                for width, item in zip(widths, items.values())
+            )
+            best = max(best, math.ceil(area / bin_area))
+
+    return best
+
+
+# Lower bounds of the number of bins
+LOWER_BOUNDS = [
+    calculate_area_lower_bound,
+    calculate_l1_lower_bound,
+    calculate_l2_lower_bound,
+    calculate_dff_lower_bound,
+]
+
+
+def calculate_lower_bound(items, bin_width, bin_height):
+    '''Returns the best lower bound of the number of bins needed to pack all items'''
+    return max(
+        lower_bound(items, bin_width, bin_height)
+        for lower_bound in LOWER_BOUNDS
+    )
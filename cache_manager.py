@@ -0,0 +1,82 @@
+from collections import OrderedDict
+
+
+def create_subproblem_cache(max_size):
+    '''Create a LRU cache for the subproblems results. Since the bins are homogeneous, the result of a subproblem only depends on the multiset of the dimensions of its items.
+
+    The cache dictionary is structured as follow:
+    - cache["max_size"]: maximum number of results stored
+    - cache["entries"]: ordered dictionary {key : (feasible, positions)}, from the least to the most recently used
+    - cache["hits"]: number of results found on the cache
+    - cache["misses"]: number of results not found on the cache
+    '''
+    return {
+        "max_size": max_size,
+        "entries": OrderedDict(),
+        "hits": 0,
+        "misses": 0
+    }
+
+
+def get_canonical_items_ids(items):
+    '''Returns the ids of the items sorted by (width, height, id). Each id is repeated by the demand of its item.'''
+    return [
+        i
+        for i in sorted(
+            items.keys(),
+            key=lambda i: (items[i]["width"], items[i]["height"], i)
+        )
+        for k in range(items[i]["demand"])
+    ]
+
+
+def get_cache_key(items):
+    '''Returns the sorted tuple of (width, height) of the items'''
+    return tuple(
+        (items[i]["width"], items[i]["height"])
+        for i in get_canonical_items_ids(items)
+    )
+
+
+def get_cached_result(cache, key):
+    '''Returns the result (feasible, positions) stored for the key, or None if it is not on the cache. The positions (l,w) follows the order of the key.'''
+    if (key not in cache["entries"]):
+        cache["misses"] += 1
+        return None
+
+    cache["hits"] += 1
+    cache["entries"].move_to_end(key)
+    return cache["entries"][key]
+
+
+def store_result(cache, key, feasible, positions):
+    '''Store the result of a subproblem. The least recently used result is removed if the cache is full.'''
+    if (cache["max_size"] <= 0):
+        return
+
+    cache["entries"][key] = (feasible, tuple(positions))
+    cache["entries"].move_to_end(key)
+
+    while (len(cache["entries"]) > cache["max_size"]):
+        cache["entries"].popitem(last=False)
+
+
+def placement_to_positions(items, placement):
+    '''Convert a placement [(i,l,w), ...] to the positions (l,w) in the canonical order of the items. The copies of an item are given the positions in the order of the placement.'''
+    positions_of_item = {i : [] for i in items.keys()}
+    for i, l, w in placement:
+        positions_of_item[i].append((l, w))
+    next_copy = dict.fromkeys(items.keys(), 0)
+    positions = []
+    for i in get_canonical_items_ids(items):
+        positions.append(positions_of_item[i][next_copy[i]])
+        next_copy[i] += 1
+    return positions
+
+
+def positions_to_placement(items, positions):
+    '''Convert the positions (l,w) in the canonical order of the items to a placement [(i,l,w), ...]'''
+    return [
+        (i, l, w)
+        for i, (l, w) in zip(get_canonical_items_ids(items), positions)
+    ]
@@ -0,0 +1,94 @@
+import bisect
+import numpy
+import scipy.sparse
+
+
+def create_coverage(items, bin_height, bin_width, placement_points="grid"):
+    '''Returns a dictionary used to answer if a cell (r,s) is cutted when the left bottom of an item i is placed on point (l,w). Only the dimensions of the items and of the bin are stored, so the memory used is proportional to the number of items instead of the number of tuples (i,l,w,r,s).
+
+    The coverage dictionary is structured as follow:
+    - coverage["bin_width"]: width of each bin
+    - coverage["bin_height"]: height of each bin
+    - coverage["widths"]: numpy array where position i is the width of item i
+    - coverage["heights"]: numpy array where position i is the height of item i
+    - coverage["placement_points"]: method used to choose the points where the left bottom of the items can be placed (see patterns_manager)
+    '''
+    size = max(items.keys(), default=0) + 1
+    widths = numpy.zeros(size, dtype=numpy.int64)
+    heights = numpy.zeros(size, dtype=numpy.int64)
+
+    for i, item in items.items():
+        widths[i] = item["width"]
+        heights[i] = item["height"]
+
+    return {
+        "bin_width": bin_width,
+        "bin_height": bin_height,
+        "widths": widths,
+        "heights": heights,
+        "placement_points": placement_points
+    }
+
+
+def create_cells_index(coverage, placements, cells_points=None):
+    '''Returns an inverted index mapping each point (r,s) to the list of placements (i,l,w) that cut it, where (l,w) is the left bottom of item i. Only the cutted points are stored, so the index is built in time proportional to the number of nonzeros of the overlapping constraints. If cells_points (sorted lists (x points, y points)) is given, only the points (r,s) with r on the x points and s on the y points are stored.'''
+    widths = coverage["widths"]
+    heights = coverage["heights"]
+
+    cells_index = {}
+    for i, l, w in placements:
+        r_values = range(l, l + int(widths[i]))
+        s_values = range(w, w + int(heights[i]))
+        if (cells_points is not None):
+            x_points, y_points = cells_points
+            r_values = x_points[
+                bisect.bisect_left(x_points, r_values.start)
+                :bisect.bisect_left(x_points, r_values.stop)
+            ]
+            s_values = y_points[
+                bisect.bisect_left(y_points, s_values.start)
+                :bisect.bisect_left(y_points, s_values.stop)
+            ]
+        for r in r_values:
+            for s in s_values:
+                if ((r, s) not in cells_index):
+                    cells_index[r, s] = []
+                cells_index[r, s].append((i, l, w))
+
+    return cells_index
+
+
+def create_cells_matrix(coverage, placements, cells_points):
+    '''Returns the sparse matrix of the values a_{i,l,w,r,s}, with a row for each point (r,s) and a column for each placement. placements is a tuple of numpy arrays (items ids, l values, w values) and cells_points is a tuple of sorted lists (x points, y points). Only the points of the cells points that are cutted by at least one placement have a row, in lexicographic (r,s) order of the cutted points. The matrix is built with numpy operations, without a loop over the placements.'''
+    items_ids, l_values, w_values = placements
+    x_points = numpy.asarray(cells_points[0], dtype=numpy.int64)
+    y_points = numpy.asarray(cells_points[1], dtype=numpy.int64)
+    widths = coverage["widths"][items_ids]
+    heights = coverage["heights"][items_ids]
+
+    # Each placement cuts a rectangle of the cells points, given by the 
+    # positions [r_start, r_end) of x points and [s_start, s_end) of y points
+    r_start = numpy.searchsorted(x_points, l_values)
+    r_end = numpy.searchsorted(x_points, l_values + widths)
+    s_start = numpy.searchsorted(y_points, w_values)
+    s_end = numpy.searchsorted(y_points, w_values + heights)
+    number_of_s = s_end - s_start
+    counts = (r_end - r_start) * number_of_s
+
+    # Enumerate the points of each rectangle
+    columns = numpy.repeat(numpy.arange(len(items_ids)), counts)
+    offsets = (
+        numpy.arange(counts.sum()) 
+        - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    )
+    number_of_s = numpy.repeat(number_of_s, counts)
+    r = numpy.repeat(r_start, counts) + offsets // number_of_s
+    s = numpy.repeat(s_start, counts) + offsets % number_of_s
+
+    # Keep only the cutted points
+    cells, rows = numpy.unique(r * len(y_points) + s, return_inverse=True)
+
+    return scipy.sparse.csr_matrix(
+        (numpy.ones(len(columns)), (rows, columns)),
+        shape=(len(cells), len(items_ids))
+    )
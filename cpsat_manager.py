@@ -0,0 +1,56 @@
+from input_manager import expand_items, collapse_placement
+
+
+def solve_subproblem_cpsat(
+    j,
+    items,
+    bin_height,
+    bin_width,
+    coverage,
+    time_limit,
+    manager=None
+):
+    '''Solve the subproblem of bin j with the OR-Tools CP-SAT solver. Each item has a position (l,w) and two interval variables, and a no overlap 2D constraint forbids the overlapping of the items. Each copy of an item is a different rectangle. The parameters coverage and manager are not used, they are kept to follow the interface of the subproblem backends. Returns a tuple (feasible, placement) as solve_subproblem_j.'''
+    # OR-Tools is only needed if this backend is used
+    from ortools.sat.python import cp_model
+
+    model = cp_model.CpModel()
+    copies = expand_items(items)
+
+    l_vars = {}
+    w_vars = {}
+    x_intervals = []
+    y_intervals = []
+    for i, item in copies.items():
+        if (item["width"] > bin_width or item["height"] > bin_height):
+            return (False, [])
+        l_vars[i] = model.NewIntVar(
+            0, bin_width - item["width"], "l_" + str(i)
+        )
+        w_vars[i] = model.NewIntVar(
+            0, bin_height - item["height"], "w_" + str(i)
+        )
+        x_intervals.append(model.NewFixedSizeIntervalVar(
+            l_vars[i], item["width"], "x_interval_" + str(i)
+        ))
+        y_intervals.append(model.NewFixedSizeIntervalVar(
+            w_vars[i], item["height"], "y_interval_" + str(i)
+        ))
+
+    model.AddNoOverlap2D(x_intervals, y_intervals)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(model)
+
+    if (status == cp_model.INFEASIBLE):
+        return (False, [])
+
+    if (status not in (cp_model.OPTIMAL, cp_model.FEASIBLE)):
+        return (None, [])
+
+    placement = [
+        (i, solver.Value(l_vars[i]), solver.Value(w_vars[i]))
+        for i in copies.keys()
+    ]
+    return (True, collapse_placement(placement))
@@ -0,0 +1,84 @@
+def create_cut_pool():
+    '''Create a pool for the Benders no-good cuts. A cut is stored as the sorted tuple of pairs (i, copies) of the items that can not be allocated together on a bin, with the number of copies of each one, so it is valid for every bin.
+
+    The pool dictionary is structured as follow:
+    - pool["fires"]: dictionary {cut : number of times the cut was posted}
+    - pool["cuts_of_item"]: dictionary {i : set of the cuts that contain item i}
+    - pool["duplicates"]: number of cuts rejected because they were already on the pool
+    - pool["dominated"]: number of cuts rejected because a cut with a subset of its copies was on the pool
+    - pool["removed"]: number of cuts of the pool removed because a new cut with a subset of their copies was added
+    '''
+    return {
+        "fires": {},
+        "cuts_of_item": {},
+        "duplicates": 0,
+        "dominated": 0,
+        "removed": 0
+    }
+
+
+def cut_is_subset(cut, other_cut):
+    '''True, if each item of the cut has at most the same number of copies on the other cut'''
+    other_copies = dict(other_cut)
+    return all(
+        copies <= other_copies.get(i, 0)
+        for i, copies in cut
+    )
+
+
+def find_dominating_cut(pool, cut):
+    '''Returns a cut of the pool whose copies are a subset of the copies of the cut, or None if there is no such cut'''
+    for i, copies in cut:
+        for pool_cut in pool["cuts_of_item"].get(i, ()):
+            # Each pool cut is checked only from its first item
+            if (pool_cut[0][0] == i and cut_is_subset(pool_cut, cut)):
+                return pool_cut
+    return None
+
+
+def remove_cut(pool, cut):
+    '''Remove a cut from the pool'''
+    del pool["fires"][cut]
+    for i, copies in cut:
+        pool["cuts_of_item"][i].discard(cut)
+
+
+def add_cut(pool, cut):
+    '''Add a cut (sorted tuple of pairs (i, copies)) to the pool. If a cut of the pool has a subset of its copies, the new cut is rejected and the pool cut is returned, since it is stronger. Otherwise, the cuts of the pool with a superset of its copies are removed and the new cut is returned. In both cases, the returned cut must be posted.'''
+    dominating_cut = find_dominating_cut(pool, cut)
+    if (dominating_cut is not None):
+        if (dominating_cut == cut):
+            pool["duplicates"] += 1
+        else:
+            pool["dominated"] += 1
+        pool["fires"][dominating_cut] += 1
+        return dominating_cut
+
+    # Remove the cuts dominated by the new cut
+    dominated_cuts = [
+        pool_cut
+        for pool_cut in pool["cuts_of_item"].get(cut[0][0], ())
+        if (cut_is_subset(cut, pool_cut))
+    ]
+    for pool_cut in dominated_cuts:
+        remove_cut(pool, pool_cut)
+        pool["removed"] += 1
+
+    pool["fires"][cut] = 1
+    for i, copies in cut:
+        if (i not in pool["cuts_of_item"]):
+            pool["cuts_of_item"][i] = set()
+        pool["cuts_of_item"][i].add(cut)
+
+    return cut
+
+
+def get_cut_pool_data(pool):
+    '''Returns a dictionary with the statistics of the pool'''
+    return {
+        "cut_pool_size": len(pool["fires"]),
+        "cut_pool_duplicates": pool["duplicates"],
+        "cut_pool_dominated": pool["dominated"],
+        "cut_pool_removed": pool["removed"],
+        "cut_pool_max_fires": max(pool["fires"].values(), default=0)
+    }
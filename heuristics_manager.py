@@ -0,0 +1,371 @@
+import random
+
+
+################################################################################
+# Items orderings starts below
+################################################################################
+
+# Functions used as key to sort the items in decreasing order
+ITEMS_ORDERINGS = [
+    lambda item: (item["width"] * item["height"], item["height"]),
+    lambda item: (item["height"], item["width"]),
+    lambda item: (item["width"], item["height"]),
+    lambda item: (max(item["width"], item["height"]), item["width"]),
+    lambda item: (item["width"] + item["height"], item["height"]),
+]
+
+
+def get_sorted_items_ids(items, ordering):
+    '''Returns the ids of the items sorted in decreasing order by the ordering'''
+    return sorted(
+        items.keys(),
+        key=lambda i: ordering(items[i]),
+        reverse=True
+    )
+
+################################################################################
+# Packing heuristics starts below
+################################################################################
+
+def overlaps(l, w, width, height, l2, w2, width2, height2):
+    '''True, if the rectangle with left bottom (l,w) overlaps the rectangle with left bottom (l2,w2)'''
+    return (
+        l < l2 + width2 and l2 < l + width
+        and w < w2 + height2 and w2 < w + height
+    )
+
+
+def contains(rectangle, other):
+    '''True, if the rectangle (l, w, width, height) contains the other rectangle'''
+    l, w, width, height = rectangle
+    l2, w2, width2, height2 = other
+    return (
+        l <= l2 and w <= w2 
+        and l2 + width2 <= l + width 
+        and w2 + height2 <= w + height
+    )
+
+
+def pack_bottom_left(items, items_ids, bin_width, bin_height):
+    '''Bottom-left heuristic. Each item is placed on the lowest, and then leftmost, point where it fits. The candidates points are the combinations of 0 and the right and top sides of the placed items. Returns the placement [(i,l,w), ...] or None if an item does not fit.'''
+    placement = []
+    # Rectangles (l, w, width, height) already placed
+    placed = []
+    candidates_l = {0}
+    candidates_w = {0}
+
+    for i in items_ids:
+        width = items[i]["width"]
+        height = items[i]["height"]
+        position = None
+        for w in sorted(candidates_w):
+            if (w + height > bin_height):
+                break
+            for l in sorted(candidates_l):
+                if (l + width > bin_width):
+                    break
+                fits = not any(
+                    overlaps(l, w, width, height, *rectangle)
+                    for rectangle in placed
+                )
+                if (fits):
+                    position = (l, w)
+                    break
+            if (position is not None):
+                break
+
+        if (position is None):
+            return None
+
+        l, w = position
+        placement.append((i, l, w))
+        placed.append((l, w, width, height))
+        candidates_l.add(l + width)
+        candidates_w.add(w + height)
+
+    return placement
+
+
+def pack_skyline(items, items_ids, bin_width, bin_height):
+    '''Skyline heuristic. The top of the packed items is kept as a list of segments [l, w, width]. Each item is placed on the segment where its top is the lowest, breaking ties by the leftmost segment. Returns the placement [(i,l,w), ...] or None if an item does not fit.'''
+    placement = []
+    skyline = [[0, 0, bin_width]]
+
+    for i in items_ids:
+        width = items[i]["width"]
+        height = items[i]["height"]
+        best = None
+        for k in range(len(skyline)):
+            l = skyline[k][0]
+            if (l + width > bin_width):
+                break
+            # The item lies on the highest segment under it
+            w = 0
+            remaining = width
+            n = k
+            while (remaining > 0):
+                w = max(w, skyline[n][1])
+                remaining -= skyline[n][2]
+                n += 1
+            if (w + height > bin_height):
+                continue
+            if (best is None or (w + height, l) < (best[1] + height, best[0])):
+                best = (l, w)
+
+        if (best is None):
+            return None
+
+        l, w = best
+        placement.append((i, l, w))
+
+        # Replace the segments under the item by its top
+        new_skyline = []
+        for segment_l, segment_w, segment_width in skyline:
+            segment_end = segment_l + segment_width
+            if (segment_end <= l or segment_l >= l + width):
+                new_skyline.append([segment_l, segment_w, segment_width])
+                continue
+            if (segment_l < l):
+                new_skyline.append([segment_l, segment_w, l - segment_l])
+            if (segment_end > l + width):
+                new_skyline.append(
+                    [l + width, segment_w, segment_end - (l + width)]
+                )
+        new_skyline.append([l, w + height, width])
+        new_skyline.sort()
+
+        # Merge the neighbor segments with the same height
+        skyline = [new_skyline[0]]
+        for segment in new_skyline[1:]:
+            if (segment[1] == skyline[-1][1]):
+                skyline[-1][2] += segment[2]
+            else:
+                skyline.append(segment)
+
+    return placement
+
+
+def pack_maxrects(items, items_ids, bin_width, bin_height):
+    '''MaxRects heuristic with the best short side fit rule. The free space is kept as a list of maximal free rectangles (l, w, width, height). Each item is placed on the left bottom of the free rectangle that leaves the shortest leftover side. Returns the placement [(i,l,w), ...] or None if an item does not fit.'''
+    placement = []
+    free_rectangles = [(0, 0, bin_width, bin_height)]
+
+    for i in items_ids:
+        width = items[i]["width"]
+        height = items[i]["height"]
+        best = None
+        best_fit = None
+        for l, w, free_width, free_height in free_rectangles:
+            if (width > free_width or height > free_height):
+                continue
+            fit = (
+                min(free_width - width, free_height - height),
+                max(free_width - width, free_height - height),
+                w,
+                l
+            )
+            if (best_fit is None or fit < best_fit):
+                best = (l, w)
+                best_fit = fit
+
+        if (best is None):
+            return None
+
+        l, w = best
+        placement.append((i, l, w))
+
+        # Split the free rectangles that overlap the item
+        new_free_rectangles = []
+        for free in free_rectangles:
+            free_l, free_w, free_width, free_height = free
+            if (not overlaps(l, w, width, height, *free)):
+                new_free_rectangles.append(free)
+                continue
+            if (l > free_l):
+                new_free_rectangles.append(
+                    (free_l, free_w, l - free_l, free_height)
+                )
+            if (l + width < free_l + free_width):
+                new_free_rectangles.append((
+                    l + width,
+                    free_w,
+                    free_l + free_width - (l + width),
+                    free_height
+                ))
+            if (w > free_w):
+                new_free_rectangles.append(
+                    (free_l, free_w, free_width, w - free_w)
+                )
+            if (w + height < free_w + free_height):
+                new_free_rectangles.append((
+                    free_l,
+                    w + height,
+                    free_width,
+                    free_w + free_height - (w + height)
+                ))
+
+        # Remove the repeated free rectangles and the ones contained on other 
+        # free rectangles
+        new_free_rectangles = list(dict.fromkeys(new_free_rectangles))
+        free_rectangles = [
+            free
+            for free in new_free_rectangles
+            if (not any(
+                other != free and contains(other, free)
+                for other in new_free_rectangles
+            ))
+        ]
+
+    return placement
+
+
+# Packing heuristics, in the order they are tried
+PACKING_HEURISTICS = [
+    pack_bottom_left,
+    pack_skyline,
+    pack_maxrects,
+]
+
+
+def pack_heuristically(
+    items, 
+    bin_width, 
+    bin_height, 
+    orderings=ITEMS_ORDERINGS, 
+    heuristics=PACKING_HEURISTICS
+):
+    '''Try to pack all items on one bin using each packing heuristic of heuristics with each ordering of orderings. Returns the placement [(i,l,w), ...] of the first packing found, or None if no heuristic could pack the items.'''
+    # Items that can not fit on the bin can not be packed by any heuristic
+    for item in items.values():
+        if (item["width"] > bin_width or item["height"] > bin_height):
+            return None
+
+    area = sum(item["width"] * item["height"] for item in items.values())
+    if (area > bin_width * bin_height):
+        return None
+
+    tried_orders = set()
+    for ordering in orderings:
+        items_ids = get_sorted_items_ids(items, ordering)
+        # Orderings that result in the same order of dimensions are the same
+        order = tuple(
+            (items[i]["width"], items[i]["height"]) for i in items_ids
+        )
+        if (order in tried_orders):
+            continue
+        tried_orders.add(order)
+        for heuristic in heuristics:
+            placement = heuristic(items, items_ids, bin_width, bin_height)
+            if (placement is not None):
+                return placement
+
+    return None
+
+################################################################################
+# Initial solution heuristics starts below
+################################################################################
+
+# Ordering and heuristic used to repack a bin on the first fit heuristic. 
+# Only one of each is tried, since a bin is repacked for each item that does 
+# not fit on it without moving the packed items
+REPACKING_ORDERINGS = ITEMS_ORDERINGS[:1]
+REPACKING_HEURISTICS = [pack_maxrects]
+
+def fits_on_packed_bin(item, placement, items, bin_width, bin_height):
+    '''Returns a position (l,w) where the item fits on a bin with a placement [(i,l,w), ...] without moving the packed items, or None if there is no such position. The candidates points are the combinations of 0 and the right and top sides of the packed items, tried from the lowest and leftmost.'''
+    placed = [
+        (l, w, items[i]["width"], items[i]["height"])
+        for i, l, w in placement
+    ]
+    candidates_l = {0} | {l + width for l, w, width, height in placed}
+    candidates_w = {0} | {w + height for l, w, width, height in placed}
+
+    for w in sorted(candidates_w):
+        if (w + item["height"] > bin_height):
+            break
+        for l in sorted(candidates_l):
+            if (l + item["width"] > bin_width):
+                break
+            fits = not any(
+                overlaps(l, w, item["width"], item["height"], *rectangle)
+                for rectangle in placed
+            )
+            if (fits):
+                return (l, w)
+    return None
+
+
+def first_fit_decreasing(items, items_ids, bin_width, bin_height):
+    '''First fit heuristic for the 2D-BPP. The items are taken in the order of items_ids and each one is packed on the first bin where it fits, first without moving the packed items and then repacking the bin with the decreasing area ordering and the MaxRects heuristic (see REPACKING_HEURISTICS). Returns a list with the placement [(i,l,w), ...] of each bin, or None if an item does not fit on an empty bin.'''
+    bins = []
+    # Items packed on each bin
+    bins_items = []
+    # Area not used of each bin
+    bins_free_area = []
+
+    for i in items_ids:
+        item = items[i]
+        area = item["width"] * item["height"]
+        packed = False
+        for k in range(len(bins)):
+            if (bins_free_area[k] < area):
+                continue
+
+            position = fits_on_packed_bin(
+                item, bins[k], items, bin_width, bin_height
+            )
+            if (position is not None):
+                bins[k].append((i, position[0], position[1]))
+            else:
+                new_bin_items = bins_items[k] | {i : item}
+                placement = pack_heuristically(
+                    new_bin_items, 
+                    bin_width, 
+                    bin_height,
+                    REPACKING_ORDERINGS,
+                    REPACKING_HEURISTICS
+                )
+                if (placement is None):
+                    continue
+                bins[k] = placement
+
+            bins_items[k][i] = item
+            bins_free_area[k] -= area
+            packed = True
+            break
+
+        if (not packed):
+            placement = pack_heuristically({i : item}, bin_width, bin_height)
+            if (placement is None):
+                return None
+            bins.append(placement)
+            bins_items.append({i : item})
+            bins_free_area.append(bin_width * bin_height - area)
+
+    return bins
+
+
+def find_initial_solution(items, bin_width, bin_height, restarts, seed=0):
+    '''Returns the solution with the fewest bins found by the first fit decreasing heuristic, using each ordering of the items and the given number of randomized restarts. The randomized orders are the decreasing area order with random swaps of neighbors. The solution is a list with the placement [(i,l,w), ...] of each bin, or None if an item does not fit on an empty bin.'''
+    random_generator = random.Random(seed)
+
+    orders = [
+        get_sorted_items_ids(items, ordering)
+        for ordering in ITEMS_ORDERINGS
+    ]
+    for restart in range(restarts):
+        order = list(orders[0])
+        for k in range(len(order) - 1):
+            if (random_generator.random() < 0.3):
+                order[k], order[k+1] = order[k+1], order[k]
+        orders.append(order)
+
+    best_solution = None
+    for order in orders:
+        solution = first_fit_decreasing(items, order, bin_width, bin_height)
+        if (solution is None):
+            return None
+        if (best_solution is None or len(solution) < len(best_solution)):
+            best_solution = solution
+
+    return best_solution
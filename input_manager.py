@@ -1,5 +1,4 @@
 import os
-import copy
 
 
 def read(file_name):
@@ -8,13 +7,13 @@ def read(file_name):
 
     All values are considered to be integer. The instance format must follow the 2DPackLib format (https://site.unibo.it/operations-research/en/research/2dpacklib).
 
-    :return (instance_data, items_id_mapping): dictionary with the instance data and a dictionary mapping the ids of the original input with fake ids to consider demand 1 for all items
-        
+    :return instance_data: dictionary with the instance data. Each item of the input is an item type with a demand, that is, the copies of an item are not expanded
+
         The instance_data dictionary is structured as follow:
         - instance_data["name"]: instance name
         - instance_data["width"]: width of each bin
         - instance_data["height"]: height of each bin
-        - instance_data["items"]: list containing dictionaries that represents the items
+        - instance_data["items"]: dictionary containing dictionaries that represents the items, indexed by the item id
 
         An item dictionary is structured as follow:
         - instance_data["items"]["id"]: item id
@@ -24,23 +23,20 @@ def read(file_name):
     '''
 
     instance_data = {}
-    
-    items_id_mapping = {}
 
     with open(file_name, "r") as input_file:
-    
+
         instance_data["name"] = os.path.basename(file_name)
-    
+
         line = input_file.readline()
         instance_data["number_of_items"] = int(line.strip())
-    
+
         line = input_file.readline()
         instance_data["width"] = int(line.split()[0].strip())
         instance_data["height"] = int(line.split()[1].strip())
-    
+
         instance_data["items"] = {}
-        fake_id = 1
-        
+
         for i in range(instance_data["number_of_items"]):
 
             line = input_file.readline()
@@ -48,19 +44,43 @@ def read(file_name):
 
             if (len(line) < 1):
                 continue
-            
+
             data = {}
-            
-            true_id = int(line[0].strip())
-            
+
+            data["id"] = int(line[0].strip())
             data["width"] = int(line[1].strip())
             data["height"] = int(line[2].strip())
-            demand = int(line[3].strip())
+            data["demand"] = int(line[3].strip())
+
+            if (data["demand"] > 0):
+                instance_data["items"][data["id"]] = data
+
+    return instance_data
+
+
+def expand_items(items):
+    '''Returns a dictionary with one item for each copy of the items. The copy k of item i has id (i, k).'''
+    return {
+        (i, k) : item
+        for i, item in items.items()
+        for k in range(item["demand"])
+    }
+
+
+def collapse_placement(placement):
+    '''Convert a placement [((i, k), l, w), ...] of expanded items (see expand_items) to a placement [(i, l, w), ...] of the items'''
+    return [(i, l, w) for (i, k), l, w in placement]
 
-            for j in range(demand):
-                items_id_mapping[fake_id] = true_id
-                data["id"] = fake_id
-                instance_data["items"][fake_id] = copy.deepcopy(data)
-                fake_id += 1
 
-    return (instance_data, items_id_mapping)
+def create_items_ids_mapping(placements):
+    '''Returns a dictionary mapping fake ids, one for each placed copy of an item, to the ids of the items, and the placements with the fake ids. placements is a dictionary {bin : [(i, l, w), ...]}.'''
+    items_ids_mapping = {}
+    fake_placements = {}
+    fake_id = 1
+    for bin_id, placement in placements.items():
+        fake_placements[bin_id] = []
+        for i, l, w in placement:
+            items_ids_mapping[fake_id] = i
+            fake_placements[bin_id].append((fake_id, l, w))
+            fake_id += 1
+    return (items_ids_mapping, fake_placements)
@@ -0,0 +1,130 @@
+import os
+import ast
+import json
+import hashlib
+
+
+# Entry function of each solution method on main (code : function name)
+METHODS_ENTRIES = {0: "run_standard_model", 1: "run_benders_model"}
+
+# Name of the file that stores the key and the status of a job on its output
+# directory
+JOB_FILE_NAME = "job.json"
+
+
+def get_source_definitions(source_dir):
+    '''Returns a dictionary {name : [source, ...]} with the source of the top level definitions (functions, classes and assignments) of the python files of a directory'''
+    definitions = {}
+    for file_name in sorted(os.listdir(source_dir)):
+        if (not file_name.endswith(".py")):
+            continue
+        with open(os.path.join(source_dir, file_name), "r") as source_file:
+            source = source_file.read()
+        for node in ast.parse(source).body:
+            if (isinstance(node, (ast.FunctionDef, ast.ClassDef))):
+                names = [node.name]
+            elif (isinstance(node, (ast.Assign, ast.AnnAssign))):
+                targets = (
+                    node.targets if (isinstance(node, ast.Assign)) 
+                    else [node.target]
+                )
+                names = [
+                    name.id 
+                    for target in targets 
+                    for name in ast.walk(target) 
+                    if (isinstance(name, ast.Name))
+                ]
+            else:
+                continue
+            segment = ast.get_source_segment(source, node)
+            for name in names:
+                if (name not in definitions):
+                    definitions[name] = []
+                definitions[name].append(segment)
+    return definitions
+
+
+def get_method_fingerprint(code, source_dir=None):
+    '''Returns a hash of the source of the definitions used by a solution method. The definitions are found by following the names used by main.run and by the entry of the method (see METHODS_ENTRIES), without the entries of the other methods. So a change on the code of one method does not change the fingerprint of the others.'''
+    if (source_dir is None):
+        source_dir = os.path.dirname(os.path.abspath(__file__))
+    definitions = get_source_definitions(source_dir)
+    excluded = set(METHODS_ENTRIES.values()) - {METHODS_ENTRIES[code]}
+
+    # Search the names used from run and from the entry of the method
+    visited = set()
+    names_to_visit = ["run", METHODS_ENTRIES[code]]
+    while (len(names_to_visit) > 0):
+        name = names_to_visit.pop()
+        if (name in visited or name in excluded or name not in definitions):
+            continue
+        visited.add(name)
+        for segment in definitions[name]:
+            for node in ast.walk(ast.parse(segment)):
+                if (isinstance(node, ast.Name)):
+                    names_to_visit.append(node.id)
+                elif (isinstance(node, ast.Attribute)):
+                    names_to_visit.append(node.attr)
+
+    fingerprint = hashlib.sha256()
+    for name in sorted(visited):
+        for segment in definitions[name]:
+            fingerprint.update(name.encode() + b"\0" + segment.encode() + b"\0")
+    return fingerprint.hexdigest()
+
+
+def get_file_hash(file_path):
+    '''Returns the sha256 hash of the content of a file'''
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as input_file:
+        for chunk in iter(lambda: input_file.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def create_job_key(input_file, code, params, method_fingerprint):
+    '''Returns the key of a job, a hash of the content of the instance file, the solution method, the time limit, the parameters and the fingerprint of the source of the method'''
+    data = {
+        "instance": get_file_hash(input_file),
+        "method": code,
+        "time_limit": params["time_limit"],
+        "params": params,
+        "source": method_fingerprint
+    }
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def read_job_status(output_directory, key):
+    '''Returns the status of the job with a key stored on its output directory, or None if the job was not run with this key'''
+    file_path = os.path.join(output_directory, JOB_FILE_NAME)
+    try:
+        with open(file_path, "r") as job_file:
+            job_data = json.load(job_file)
+    except (OSError, ValueError):
+        return None
+    if (job_data.get("key") != key):
+        return None
+    return job_data.get("status")
+
+
+def job_is_finished(output_directory, key):
+    '''True, if the job with a key was finished and its solution was written on its output directory'''
+    return (
+        read_job_status(output_directory, key) == "finished"
+        and os.path.exists(
+            os.path.join(output_directory, "solution_data.json")
+        )
+    )
+
+
+def write_job_status(output_directory, key, status, exitcode=None):
+    '''Store the key and the status ("finished", "killed" or "timed_out") of a job on its output directory. Only the finished jobs are skipped when the sweep is run again.'''
+    os.makedirs(output_directory, exist_ok=True)
+    file_path = os.path.join(output_directory, JOB_FILE_NAME)
+    with open(file_path, "w") as job_file:
+        json.dump(
+            {"key": key, "status": status, "exitcode": exitcode}, 
+            job_file
+        )
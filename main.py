@@ -1,13 +1,84 @@
 import os
 import sys
 import math
-import json
 import csv
 import time
 import signal
-from models_manager import *
-from input_manager import read
-from output_manager import draw_solution
+from input_manager import *
+from heuristics_manager import find_initial_solution
+from bounds_manager import calculate_lower_bound
+from preprocessing_manager import preprocess_instance, restore_placements
+from solution_manager import create_compact_solution, write_json
+
+# The solver (models_manager, gurobipy, numpy and scipy) and the plotting 
+# (output_manager and matplotlib) stacks are imported by the functions of 
+# their phases, so a run only loads the stacks that it uses
+
+
+# Parameters of the solution methods
+DEFAULT_PARAMETERS = {
+    # Maximum number of subproblems results kept on the cache of the Benders 
+    # callback. If 0, the results are not stored
+    "subproblem_cache_size": 10000,
+    # Number of threads used to solve the subproblems of the Benders callback 
+    # in parallel. If 1, the subproblems are solved sequentially
+    "subproblem_workers": 1,
+    # If True, the packing heuristics are tried before solving a subproblem 
+    # model of the Benders callback
+    "subproblem_heuristics": True,
+    # If True, the infeasibility filters (bounds and relaxations) are tried 
+    # before solving a subproblem model of the Benders callback
+    "subproblem_filters": True,
+    # Exact method used to solve the subproblems of the Benders callback: 
+    # "mip" (grid model solved by Gurobi), "cpsat" (OR-Tools CP-SAT) or 
+    # "bitboard" (depth first search over bitmasks, for bins up to 30 x 30 
+    # points after the preprocessing)
+    "subproblem_backend": "mip",
+    # If True, the items of an infeasible subproblem are reduced to a minimal 
+    # infeasible subset before creating the Benders cut
+    "cut_strengthening": True,
+    # Time limit (seconds) of each subproblem solved to reduce the items
+    "cut_strengthening_time_limit": 1,
+    # If True, a heuristic solution is used as MIP start and its number of 
+    # bins is used as the number of bins of the models
+    "warm_start": True,
+    # Number of randomized restarts of the heuristic of the MIP start
+    "warm_start_restarts": 10,
+    # If True, the lower bounds of the number of bins are calculated to fix 
+    # the first bins as used. If the lower bound is equal to the number of 
+    # bins of the heuristic solution, the models are not solved
+    "lower_bounds": True,
+    # Points where the left bottom of the items can be placed on the standard 
+    # model and on the subproblem models: "grid" (every integer point), 
+    # "normal_patterns" (sums of the dimensions of the other items) or 
+    # "meet_in_the_middle" (normal patterns pushed to the left or to the 
+    # right of a threshold, never more points than the normal patterns)
+    "placement_points": "normal_patterns",
+    # If True, the bin is trimmed, the items are enlarged and the dimensions 
+    # are divided by their greatest common divisor before creating the 
+    # models. The solution is converted back to the original instance
+    "preprocessing": True,
+    # If True, the standard model is built with the matrix API, with the 
+    # coefficients of each group of constraints added as a sparse matrix
+    "matrix_api": True,
+    # If True, the variables and constraints of the standard model built 
+    # with the matrix API are named (used to debug with print_model)
+    "variable_names": False,
+    # If True, the variables with value != 0 of the solution of the solved 
+    # model are written on a binary columnar file (solution_variables.bin, 
+    # see solution_manager)
+    "variables_dump": False,
+    # Backend used to draw the bins of the solution: "matplotlib" (png), 
+    # "svg" (svg written without matplotlib) or "none" (not drawn)
+    "render_backend": "matplotlib",
+    # Number of processes used to draw the bins in parallel
+    "render_workers": 1,
+    # Maximum number of threads used by Gurobi on the standard model and on 
+    # the master problem. If 0, Gurobi chooses
+    "threads": 0,
+    # Time limit (seconds) of the standard model and of the master problem
+    "time_limit": 1800,
+}
 
 
 def create_directory_if_not_exists(dir_path):
@@ -16,46 +87,45 @@ def create_directory_if_not_exists(dir_path):
         os.makedirs(dir_path)
 
 def draw(
-    x_vars_dict, 
-    z_vars_dict, 
+    placements, 
     instance_data, 
-    items_ids_mapping, 
     output_directory, 
-    prefix=""
+    prefix="", 
+    backend="matplotlib", 
+    workers=1
 ):
-    '''Get draw parameters and call draw_solution to plot the optimization result'''
-    bin_ids = []
+    '''Get draw parameters and call draw_solutions to plot the optimization result. placements is a dictionary {bin : [(i,l,w), ...]} with the used bins.'''
+    from output_manager import draw_solutions
 
-    # Get the index of the last used bin
-    for var_name, value in z_vars_dict.items():
-        if (value > 0.5):
-            bin_ids.append(int(var_name.split("_")[1]))
-    last_bin_id = max(bin_ids)
+    # Each copy of an item is drawn with a fake id mapped to the item id
+    items_ids_mapping, fake_placements = create_items_ids_mapping(placements)
 
-    for k in range(1, last_bin_id+1):
+    bins = []
+    for k in sorted(fake_placements.keys()):
         x = {}
         y = {}
         items_to_draw = {}
-        # Get the position (x, y) of the bin for each item 
-        for var_name, value in x_vars_dict.items():
-            i, j, l, w = var_name.split("_")[1:]
-            if (int(j) == k and value > 0.5):
-                x[int(i)] = int(l)
-                y[int(i)] = int(w)
-                items_to_draw[int(i)] = instance_data["items"][int(i)]
-        
-        # Plot the items on bin k
-        draw_solution(
-            items_to_draw,
-            items_ids_mapping,
-            x,
-            y,
-            instance_data["width"], 
-            instance_data["height"],
-            output_directory,
-            k,
-            prefix
-        )
+        # Get the position (x, y) of the bin for each copy of an item
+        for fake_id, l, w in fake_placements[k]:
+            x[fake_id] = l
+            y[fake_id] = w
+            items_to_draw[fake_id] = (
+                instance_data["items"][items_ids_mapping[fake_id]] 
+                | {"id" : fake_id}
+            )
+        bins.append((k, items_to_draw, x, y))
+
+    # Plot the items on the bins
+    draw_solutions(
+        bins,
+        items_ids_mapping,
+        instance_data["width"], 
+        instance_data["height"],
+        output_directory,
+        prefix,
+        backend,
+        workers
+    )
 
 
 def calculate_items_areas(items):
@@ -66,57 +136,97 @@ def calculate_items_areas(items):
     }
     
 
-def create_points_cutted_matrix(items, bin_height, bin_width):
-    '''Returns a set of tuples (i,l,w,r,s). If (i,l,w,r,s) is in the set, then the point (r,s) is cutted if the left bottom of item i is placed on point (l,w)'''
+def create_points_cutted_matrix(
+    items, 
+    bin_height, 
+    bin_width, 
+    placement_points="grid"
+):
+    '''Returns the coverage data used to get the values of a_{i,l,w,r,s}. The point (r,s) is cutted if the left bottom of item i is placed on point (l,w) (see coverage_manager)'''
+    from coverage_manager import create_coverage
 
-    point_is_cutted = set()
-    
-    for i in range(1, len(items)+1):
-        item = items[i]
-        l = 0
-        width = item["width"]
-        height = item["height"]
-        while (l + width - 1 <= bin_width - 1):
-            r = l
-            while (r <= l + width - 1):
-                w = 0
-                while (w + height - 1 <= bin_height - 1):
-                    s = w
-                    while (s <= w + height - 1):
-                        point_is_cutted.add((item["id"],l,w,r,s))
-                        s += 1
-                    w += 1
-                r += 1
-            l += 1
-    
-    return point_is_cutted
+    return create_coverage(items, bin_height, bin_width, placement_points)
+
+
+def calculate_number_of_bins(items, items_areas, bin_area):
+    '''Return the estimated number of bins. The value is calculated by dividing the sum of the areas of the copies of the items by the bin area. The number is rounded to ceil and then is increased in 20% and then it is rounded to ceil again.'''
+    total_area = sum(
+        items_areas[i] * item["demand"] 
+        for i, item in items.items()
+    )
+    return math.ceil((math.ceil(total_area/bin_area)) * 1.2)
 
 
-def calculate_number_of_bins(items_areas, bin_area):
-    '''Return the estimated number of bins. The value is calculated by dividing the sum of the items areas by the bin area. The number is rounded to ceil and then is increased in 20% and then it is rounded to ceil again.'''
-    return math.ceil((math.ceil(sum(items_areas.values())/bin_area)) * 1.2)
+def dump_variables(model, variables_path, instance_data):
+    '''Write the variables with value != 0 of the solution of a model on variables_path, with the positions of the original instance. Returns the time spent, which is not counted on the real time. If variables_path is empty, nothing is written.'''
+    if (variables_path == ""):
+        return 0
+    from models_manager import write_nonzero_variables
+
+    s = time.time()
+    write_nonzero_variables(
+        model,
+        variables_path,
+        instance_data.get("width_scale", 1),
+        instance_data.get("height_scale", 1)
+    )
+    return time.time() - s
 
 
 def run_standard_model(
     instance_data, 
-    point_is_cutted, 
+    coverage, 
     time_limit,
-    log_path="" 
+    log_path="",
+    params=DEFAULT_PARAMETERS,
+    variables_path=""
 ):    
-    '''Construct and run the complete model'''
-    
-    model = create_standard_model(
-        instance_data["items"],
-        instance_data["height"],
-        instance_data["width"], 
-        instance_data["items_areas"],
-        instance_data["bin_area"],
-        point_is_cutted,
-        instance_data["number_of_bins"],
-        "standard-2D-BPP",
-        log_path,
-        time_limit
+    '''Construct and run the complete model. If variables_path is given, the variables with value != 0 are written on it.'''
+    from models_manager import (
+        create_standard_model,
+        create_standard_model_matrix,
+        model_is_infeasible,
+        print_iis,
+        feasible_not_found,
+        get_standard_solution_placements,
+        get_solution_dict_MIP
     )
+    
+    s = time.time()
+    if (params["matrix_api"]):
+        model = create_standard_model_matrix(
+            instance_data["items"],
+            instance_data["height"],
+            instance_data["width"], 
+            instance_data["items_areas"],
+            instance_data["bin_area"],
+            coverage,
+            instance_data["number_of_bins"],
+            "standard-2D-BPP",
+            log_path,
+            time_limit,
+            initial_solution=instance_data["initial_solution"],
+            lower_bound=instance_data["lower_bound"],
+            names=params["variable_names"],
+            threads=params["threads"]
+        )
+    else:
+        model = create_standard_model(
+            instance_data["items"],
+            instance_data["height"],
+            instance_data["width"], 
+            instance_data["items_areas"],
+            instance_data["bin_area"],
+            coverage,
+            instance_data["number_of_bins"],
+            "standard-2D-BPP",
+            log_path,
+            time_limit,
+            initial_solution=instance_data["initial_solution"],
+            lower_bound=instance_data["lower_bound"],
+            threads=params["threads"]
+        )
+    build_time = time.time() - s
 
     print("STARTING OPT")
     s = time.time()
@@ -132,47 +242,80 @@ def run_standard_model(
     if (feasible_not_found(model)):
         sol_dict = get_solution_dict_MIP(model)
         model.close()
-        return ({}, {}, {})
+        return ({}, {})
     
-    # Get the variables values
-    z_vars_dict = {}
-    x_vars_dict = {}
-    for var in model.getVars():
-        if ("z" in var.VarName):
-            if (var.x > 0.5):
-                z_vars_dict[var.VarName] = var.x
-        if ("x" in var.VarName):
-            if (var.x > 0.5):
-                x_vars_dict[var.VarName] = var.x
+    # Get the placements of the used bins
+    placements = get_standard_solution_placements(model)
 
     # Create a dictionary with data related to the solution
     sol_dict = get_solution_dict_MIP(model)
+    sol_dict["build_time"] = build_time
     sol_dict["opt_time"] = opt_time
+    sol_dict["dump_time"] = dump_variables(
+        model, 
+        variables_path, 
+        instance_data
+    )
 
     model.close()
 
-    return (x_vars_dict, z_vars_dict, sol_dict)
+    return (placements, sol_dict)
 
 
-def run_benders_model(instance_data, point_is_cutted, time_limit, log_path=""):
+def run_benders_model(
+    instance_data, 
+    coverage, 
+    time_limit, 
+    log_path="", 
+    params=DEFAULT_PARAMETERS,
+    variables_path=""
+):
+    '''Construct and run the master problem with the Benders callback. If variables_path is given, the variables with value != 0 are written on it.'''
+    from models_manager import (
+        create_master_problem,
+        master_call_back,
+        dispose_subproblem_manager,
+        dispose_subproblem_pool,
+        model_is_infeasible,
+        print_iis,
+        feasible_not_found,
+        get_solution_dict_MIP,
+        get_cut_pool_data
+    )
 
+    s = time.time()
     model = create_master_problem(
         instance_data["items"],
         instance_data["height"],
         instance_data["width"], 
         instance_data["items_areas"],
         instance_data["bin_area"],
-        point_is_cutted,
+        coverage,
         instance_data["number_of_bins"],
         "master-2D-BPP",
         log_path,
-        time_limit
+        time_limit,
+        subproblem_cache_size=params["subproblem_cache_size"],
+        subproblem_workers=params["subproblem_workers"],
+        subproblem_heuristics=params["subproblem_heuristics"],
+        subproblem_filters=params["subproblem_filters"],
+        subproblem_backend=params["subproblem_backend"],
+        cut_strengthening=params["cut_strengthening"],
+        cut_strengthening_time_limit=params["cut_strengthening_time_limit"],
+        initial_solution=instance_data["initial_solution"],
+        lower_bound=instance_data["lower_bound"],
+        threads=params["threads"]
     )
+    build_time = time.time() - s
     print("STARTING OPT")
     s = time.time()
     model.optimize(master_call_back)
     opt_time = time.time() - s
     print("opt time:", time.time() - s)
+
+    if (model._subproblem_pool is not None):
+        dispose_subproblem_pool(model._subproblem_pool)
+    dispose_subproblem_manager(model._subproblem_manager)
     
     # If infeasible calculate the infeasible constraints
     if (model_is_infeasible(model)):
@@ -181,31 +324,74 @@ def run_benders_model(instance_data, point_is_cutted, time_limit, log_path=""):
 
     if (feasible_not_found(model)):
         model.close()
-        return ({}, {}, {})
-    
-    # Get the variables z values
-    z_vars_dict = {}
-    for var in model.getVars():
-        if ("z" in var.VarName):
-            if (var.x > 0.5):
-                z_vars_dict[var.VarName] = var.x
+        return ({}, {})
     
     # # Uncomment to print the model with lazy constraints
-    # for lazy in model._lazy_set:
-    #     model.addConstr(lazy)
+    # from models_manager import (
+    #     create_feasibility_cut_expr_for_subproblem,
+    #     print_model
+    # )
+    # for cut in model._cut_pool["fires"].keys():
+    #     for lazy in create_feasibility_cut_expr_for_subproblem(
+    #         model, 
+    #         model._number_of_bins, 
+    #         {(i, 1) : copies for i, copies in cut}
+    #     ).values():
+    #         model.addConstr(lazy)
     # print_model(model)
 
     # Create a dictionary with data related to the solution
     sol_dict = get_solution_dict_MIP(model)
+    sol_dict["build_time"] = build_time
     sol_dict["opt_time"] = opt_time
+    sol_dict["subproblems_time"] = model._subproblems_time
+    sol_dict["cache_hits"] = model._subproblem_cache["hits"]
+    sol_dict["cache_misses"] = model._subproblem_cache["misses"]
+    sol_dict |= get_cut_pool_data(model._cut_pool)
+    sol_dict["dump_time"] = dump_variables(
+        model, 
+        variables_path, 
+        instance_data
+    )
     
     model.close()
 
-    return (model._x_vars, z_vars_dict, sol_dict)
+    # Placements of the used bins, stored by the callback
+    return (model._solution_placements, sol_dict)
+
+def create_solution_from_initial_solution(instance_data):
+    '''Returns (placements, sol_dict) of the initial solution. Used when the initial solution is proven optimal by the lower bound, so no model is solved.'''
+    placements = dict(enumerate(instance_data["initial_solution"], start=1))
+
+    # The objective is sum_{j \in P}{j * z_{j}}
+    number_of_bins = len(instance_data["initial_solution"])
+    objective = number_of_bins * (number_of_bins + 1) / 2
+
+    sol_dict = {
+        "objective": objective,
+        "is_optimal": True,
+        "inf_or_unb": False,
+        "feasible_found": True,
+        "node_count": 0,
+        "total_time": 0,
+        "dual_bound": objective,
+        "gap": 0.0,
+        "cb_total_time": 0,
+        "build_time": 0,
+        "opt_time": 0,
+        "dump_time": 0
+    }
 
-def run(argv):
+    return (placements, sol_dict)
+
+
+def run(argv, params=None):
+    '''Solve an instance and write its solution. Returns the dictionary with data related to the solution, with the time spent on each phase.'''
     start_time = time.time()
 
+    if (params is None):
+        params = DEFAULT_PARAMETERS
+
     if (len(argv) < 2):
         print("1. Needs instance name")
         print("2. Needs output directory")
@@ -219,7 +405,19 @@ def run(argv):
 
     create_directory_if_not_exists(output_directory)
 
-    instance_data, items_ids_mapping = read(input_file)
+    # Time (seconds) spent on each phase before the models
+    phases_times = {}
+
+    s = time.time()
+    original_instance_data = read(input_file)
+    phases_times["read_time"] = time.time() - s
+
+    # The models are solved on an equivalent instance on a smaller grid
+    s = time.time()
+    instance_data = original_instance_data
+    if (params["preprocessing"]):
+        instance_data = preprocess_instance(original_instance_data)
+    phases_times["preprocessing_time"] = time.time() - s
 
     instance_data["items_areas"] = calculate_items_areas(instance_data["items"])
     instance_data["bin_area"] = (
@@ -227,76 +425,154 @@ def run(argv):
     )
 
     instance_data["number_of_bins"] = calculate_number_of_bins(
+        instance_data["items"],
         instance_data["items_areas"], 
         instance_data["bin_area"]
     )
 
-    # set containing a_{i,l,w,r,s}
-    point_is_cutted = create_points_cutted_matrix(
-        instance_data["items"],
-        instance_data["height"],
-        instance_data["width"]
+    # The heuristic and the lower bounds handle each copy of an item as a 
+    # different item
+    copies = expand_items(instance_data["items"])
+
+    # The heuristic solution is an upper bound for the number of bins
+    s = time.time()
+    instance_data["initial_solution"] = None
+    if (params["warm_start"]):
+        # None if an item does not fit on an empty bin
+        initial_solution = find_initial_solution(
+            copies,
+            instance_data["width"],
+            instance_data["height"],
+            params["warm_start_restarts"]
+        )
+        if (initial_solution is not None):
+            instance_data["initial_solution"] = [
+                collapse_placement(placement)
+                for placement in initial_solution
+            ]
+    if (instance_data["initial_solution"] is not None):
+        instance_data["number_of_bins"] = len(
+            instance_data["initial_solution"]
+        )
+
+    instance_data["lower_bound"] = 0
+    if (params["lower_bounds"]):
+        instance_data["lower_bound"] = calculate_lower_bound(
+            copies,
+            instance_data["width"],
+            instance_data["height"]
+        )
+    phases_times["bounds_time"] = time.time() - s
+
+    # If the lower bound is equal to the number of bins of the heuristic 
+    # solution, then it is optimal
+    closed_by_bounds = (
+        instance_data["initial_solution"] is not None
+        and instance_data["lower_bound"] == instance_data["number_of_bins"]
     )
 
-    # print("Set with a_{i,l,w,r,s} created")
+    # coverage data used to get a_{i,l,w,r,s}. Only needed if a model is 
+    # solved
+    s = time.time()
+    coverage = None
+    if (not closed_by_bounds):
+        coverage = create_points_cutted_matrix(
+            instance_data["items"],
+            instance_data["height"],
+            instance_data["width"],
+            params["placement_points"]
+        )
+
+    phases_times["coverage_time"] = time.time() - s
+
+    # print("Coverage data of a_{i,l,w,r,s} created")
 
     draw_prefix = ""
     log_path = os.path.join(output_directory, "solution.log")
-    time_limit = 1800
+    variables_path = ""
+    if (params["variables_dump"]):
+        variables_path = os.path.join(
+            output_directory, 
+            "solution_variables.bin"
+        )
+    time_limit = params["time_limit"]
     # argv[2] indicates the solution method. If 1, then use benders. Otherwise, use the complete model
-    if (len(argv) >= 3 and int(argv[2]) == 1):
-        x_vars_dict, z_vars_dict, sol_dict = run_benders_model(
+    use_benders = (len(argv) >= 3 and int(argv[2]) == 1)
+    if (closed_by_bounds):
+        placements, sol_dict = (
+            create_solution_from_initial_solution(instance_data)
+        )
+        draw_prefix = "benders_" if (use_benders) else "standard_"
+
+    elif (use_benders):
+        placements, sol_dict = run_benders_model(
             instance_data, 
-            point_is_cutted,
+            coverage,
             time_limit,
-            log_path 
+            log_path,
+            params,
+            variables_path
         )
         draw_prefix = "benders_"
     
     else:
-        x_vars_dict, z_vars_dict, sol_dict = run_standard_model(
+        placements, sol_dict = run_standard_model(
             instance_data, 
-            point_is_cutted,
+            coverage,
             time_limit,
-            log_path
+            log_path,
+            params,
+            variables_path
         )
         draw_prefix = "standard_"
     
+    # Convert the positions to the original instance
+    placements = restore_placements(placements, instance_data)
+
     end_time = time.time()
 
-    # Calculate the total time spent by the program
-    sol_dict["real_time"] = end_time - start_time
+    # Calculate the total time spent by the program. The time spent writing 
+    # the solution is not counted
+    sol_dict["real_time"] = (
+        end_time - start_time - sol_dict.get("dump_time", 0)
+    )
+    sol_dict["lower_bound"] = instance_data["lower_bound"]
+    sol_dict["closed_by_bounds"] = closed_by_bounds
+    sol_dict |= phases_times
     
-    # Save the dictionary with data related to the solution in a json
+    # Save the data related to the solution and the placements of the used 
+    # bins in a json
+    s = time.time()
     json_file_path = os.path.join(output_directory, "solution_data.json")
-    with open(json_file_path, "w") as output:
-        json.dump(sol_dict, output, indent=2)
+    write_json(
+        sol_dict | create_compact_solution(placements), 
+        json_file_path
+    )
     
     # Save the dictionary with data related to the solution in a csv
     csv_file_path = os.path.join(output_directory, "solution_data.csv")
     with open(csv_file_path, "w", newline="") as output:
-        keys = [
-            key 
-            for key in sol_dict.keys() 
-            if key != "variables"
-        ]
+        keys = list(sol_dict.keys())
         out_csv = csv.writer(output, keys)
         out_csv.writerow(keys)
         out_csv.writerow([sol_dict[key] for key in keys])
 
-    # If z_vars_dict is empty, then no solution was found
-    if (len(z_vars_dict) == 0):
-        return
+    # If placements is empty, then no solution was found. The solution is 
+    # not drawn either if the render backend is "none"
+    if (len(placements) > 0 and params["render_backend"] != "none"):
+        draw(
+            placements,
+            original_instance_data,
+            output_directory,
+            draw_prefix,
+            params["render_backend"],
+            params["render_workers"]
+        )
 
-    # Otherwise, draw the solution
-    draw(
-        x_vars_dict,
-        z_vars_dict,
-        instance_data,
-        items_ids_mapping,
-        output_directory,
-        draw_prefix
-    )
+    # The time spent writing the solution is only returned, it is not on the 
+    # files of the solution
+    sol_dict["output_time"] = time.time() - s
+    return sol_dict
     
 
 if __name__ == "__main__":
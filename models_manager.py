@@ -1,13 +1,36 @@
 import os
 import time
+import threading
+import concurrent.futures
+import numpy
+import scipy.sparse
 from gurobipy import *
+from input_manager import expand_items, collapse_placement
+from coverage_manager import create_cells_index, create_cells_matrix
+from patterns_manager import create_placement_points, get_cells_points
+from cache_manager import *
+from heuristics_manager import pack_heuristically
+from bounds_manager import bin_is_infeasible
+from cpsat_manager import solve_subproblem_cpsat
+from bitboard_manager import solve_subproblem_bitboard, check_bin_points
+from cuts_manager import *
+from solution_manager import write_variables_block
+
+# Data of each worker thread of the subproblems pool
+_worker_data = threading.local()
 
 ################################################################################
 # Auxiliaries functions starts below
 ################################################################################
 
-def set_parameters(model, time_limit, log_path="", problem_type="standard"):
-    '''Set Gurobi Parameters'''
+def set_parameters(
+    model, 
+    time_limit, 
+    log_path="", 
+    problem_type="standard", 
+    threads=0
+):
+    '''Set Gurobi Parameters. If threads is 0, Gurobi chooses the number of threads.'''
     model.Params.TimeLimit = time_limit
     if (problem_type == "subproblem"):
         # model.Params.OutputFlag = 0
@@ -15,6 +38,7 @@ def set_parameters(model, time_limit, log_path="", problem_type="standard"):
         return
     if (problem_type == "master_problem"):
         model.Params.LazyConstraints = 1
+    model.Params.Threads = threads
     
     # model.Params.TimeLimit = time_limit
     if (log_path != ""):
@@ -52,7 +76,6 @@ def feasible_not_found(model):
 def get_solution_dict(model):
     '''Create a dictionary with data related to a optimized model'''
     data = {
-        "variables": None,
         "objective": None,
         "is_optimal": False,
         "inf_or_unb": False,
@@ -74,11 +97,6 @@ def get_solution_dict(model):
 
     if (model.SolCount == 0):
         return data
-    
-
-    data["variables"] = {}
-    for v in model.getVars():
-        data["variables"][v.VarName] = v.X
 
     if (model.status == GRB.OPTIMAL):
         data["is_optimal"] = True
@@ -90,6 +108,120 @@ def get_solution_dict(model):
     return data
 
 
+def get_standard_solution_placements(model):
+    '''Returns the placements {j : [(i,l,w), ...]} of the used bins on the solution of a standard model. The values of the x variables are read with one call on the array of the variables, and decoded with their keys.'''
+    placements = {}
+
+    if (getattr(model, "_x_array", None) is None):
+        x_values = model.getAttr("X", model._x_list)
+        for (i, j, l, w), value in zip(model._x_keys, x_values):
+            if (value > 0.5):
+                if (j not in placements):
+                    placements[j] = []
+                placements[j].append((i, l, w))
+        return placements
+
+    items_ids, l_values, w_values = model._placements
+    number_of_placements = len(items_ids)
+    x_values = model._x_array.X
+    for index in numpy.flatnonzero(x_values > 0.5).tolist():
+        j, p = divmod(index, number_of_placements)
+        if (j + 1 not in placements):
+            placements[j + 1] = []
+        placements[j + 1].append((items_ids[p], l_values[p], w_values[p]))
+
+    return placements
+
+
+def write_nonzero_keys(output, group, keys, values, chunk_size):
+    '''Write the variables with value != 0 on the binary dump, reading chunk_size values at a time. keys is a list of keys (tuples) and values is a function that returns the values of the variables of a slice of the keys.'''
+    for start in range(0, len(keys), chunk_size):
+        chunk_values = numpy.asarray(values(start, start + chunk_size))
+        nonzero = numpy.flatnonzero(numpy.abs(chunk_values) > 1e-6)
+        write_variables_block(
+            output,
+            group,
+            [keys[start + index] for index in nonzero.tolist()],
+            chunk_values[nonzero]
+        )
+
+
+def write_nonzero_variables(
+    model, 
+    file_path, 
+    width_scale=1, 
+    height_scale=1, 
+    chunk_size=100000
+):
+    '''Write the variables with value != 0 of the solution of a standard or master model on a binary columnar file (see solution_manager). The variables are read and written chunk_size at a time, so the values of all variables are never on a dictionary. The positions of the x variables are multiplied by the scales of a preprocessed instance. For the master model, the x variables are the placements found by the subproblems.'''
+    with open(file_path, "wb") as output:
+        # Matrix standard model: the x values are decoded with the placements
+        if (getattr(model, "_x_array", None) is not None):
+            items_ids, l_values, w_values = (
+                numpy.asarray(values) for values in model._placements
+            )
+            number_of_placements = len(items_ids)
+            x_values = model._x_array.X
+            for start in range(0, len(x_values), chunk_size):
+                chunk_values = x_values[start:start + chunk_size]
+                nonzero = numpy.flatnonzero(numpy.abs(chunk_values) > 1e-6)
+                j, p = numpy.divmod(nonzero + start, number_of_placements)
+                write_variables_block(
+                    output,
+                    "x",
+                    numpy.column_stack([
+                        items_ids[p],
+                        j + 1,
+                        l_values[p] * width_scale,
+                        w_values[p] * height_scale
+                    ]),
+                    chunk_values[nonzero]
+                )
+            z_values = model._z_array.X
+            nonzero = numpy.flatnonzero(numpy.abs(z_values) > 1e-6)
+            write_variables_block(output, "z", nonzero + 1, z_values[nonzero])
+            return
+
+        # Master model: the x variables are the placements of the subproblems
+        if (getattr(model, "_b_vars", None) is not None):
+            groups = {
+                "b" : model._b_vars, 
+                "y" : model._y_vars, 
+                "z" : model._z_vars
+            }
+            x_keys = [
+                (i, j, l * width_scale, w * height_scale)
+                for j, placement in model._solution_placements.items()
+                for i, l, w in placement
+            ]
+            write_variables_block(output, "x", x_keys, [1.0] * len(x_keys))
+        # Standard model
+        else:
+            groups = {"z" : model._z_vars}
+            x_keys = [
+                (i, j, l * width_scale, w * height_scale)
+                for i, j, l, w in model._x_keys
+            ]
+            write_nonzero_keys(
+                output,
+                "x",
+                x_keys,
+                lambda start, end: model.getAttr("X", model._x_list[start:end]),
+                chunk_size
+            )
+
+        for group, variables in groups.items():
+            keys = list(variables.keys())
+            variables_list = list(variables.values())
+            write_nonzero_keys(
+                output,
+                group,
+                [key if (type(key) == tuple) else (key,) for key in keys],
+                lambda start, end: model.getAttr("X", variables_list[start:end]),
+                chunk_size
+            )
+
+
 def get_solution_dict_MIP(model):
     '''Create a dictionary with data related to a optimized MIP model'''
     data = get_solution_dict(model)
@@ -103,8 +235,20 @@ def get_solution_dict_MIP(model):
 # Variable creation functions starts below
 ################################################################################
 
-def create_x_j_vars(model, items, bin_height, bin_width, j):
-    '''Create the x variables for a bin. Standard and subproblem models only.'''
+def get_x_var_name(i, j, l, w):
+    '''Returns the name of the variable x_{i,j,l,w}'''
+    return "x_" + str(i) + "_" + str(j) + "_" + str(l) + "_" + str(w)
+
+
+def create_x_j_vars(
+    model, 
+    items, 
+    bin_height, 
+    bin_width, 
+    j, 
+    placement_points=None
+):
+    '''Create the x variables for a bin. If placement_points is given (see patterns_manager), only its points are used. Otherwise, every integer point is used. Standard and subproblem models only.'''
 
     # Variable name on gurobi
     x_vars_names = {}
@@ -112,21 +256,24 @@ def create_x_j_vars(model, items, bin_height, bin_width, j):
     x_vars_keys = {}
     # List of keys of the variables of bin j
     x_of_bin_vars_key = []
+    # Dictionary containing the lists of keys of the variables of each item i
+    x_of_item_vars_keys = {}
     # Dictionary of variables. Format -> {(i,j,l,w) : variable}
     x_vars = {}
     
     # Create each variable for each item and each possible (l,w) point
     for i in items.keys():
-        for l in range(bin_width - items[i]["width"] + 1):
-            for w in range(bin_height - items[i]["height"] + 1):
-                var_name = (
-                    "x_" 
-                    + str(items[i]["id"]) + "_" 
-                    + str(j) + "_" 
-                    + str(l) + "_" 
-                    + str(w)
-                )
+        x_of_item_vars_keys[i] = []
+        l_values = range(bin_width - items[i]["width"] + 1)
+        w_values = range(bin_height - items[i]["height"] + 1)
+        if (placement_points is not None):
+            l_values = placement_points["x"][i]
+            w_values = placement_points["y"][i]
+        for l in l_values:
+            for w in w_values:
+                var_name = get_x_var_name(items[i]["id"], j, l, w)
                 x_of_bin_vars_key.append((i, j, l, w))
+                x_of_item_vars_keys[i].append((i, j, l, w))
                 x_vars_keys[i,j,l,w] = (i,j,l,w)
                 x_vars_names[i,j,l,w] = var_name
                 x_vars[i,j,l,w] = model.addVar(
@@ -134,10 +281,23 @@ def create_x_j_vars(model, items, bin_height, bin_width, j):
                     vtype=GRB.BINARY
                 )
 
-    return (x_vars_names, x_vars_keys, x_of_bin_vars_key, x_vars)
+    return (
+        x_vars_names, 
+        x_vars_keys, 
+        x_of_bin_vars_key, 
+        x_of_item_vars_keys, 
+        x_vars
+    )
 
 
-def create_x_vars(model, items, bin_height, bin_width, number_of_bins):
+def create_x_vars(
+    model, 
+    items, 
+    bin_height, 
+    bin_width, 
+    number_of_bins, 
+    placement_points=None
+):
     '''Create the x variables for each bin. Standar model only.'''
     # Variable name on gurobi
     x_vars_names = {}
@@ -145,21 +305,38 @@ def create_x_vars(model, items, bin_height, bin_width, number_of_bins):
     x_vars_keys = {}
     # Dictionary containing the lists of keys of the variables of each bin j
     x_of_bin_vars_keys = {}
+    # Dictionary containing the lists of keys of the variables of each item i
+    x_of_item_vars_keys = {i : [] for i in items.keys()}
     # Dictionary of variables. Format -> {(i,j,l,w) : variable}
     x_vars = {}
 
     # Create the x variables for each bin j
     for j in range(1, number_of_bins+1):
-        vars_data = create_x_j_vars(model, items, bin_height, bin_width, j)
+        vars_data = create_x_j_vars(
+            model, 
+            items, 
+            bin_height, 
+            bin_width, 
+            j, 
+            placement_points
+        )
         
         # Join the returned dictionaries
         x_vars_names |= vars_data[0]
         x_vars_keys |= vars_data[1]
         x_of_bin_vars_keys[j] = vars_data[2]
-        x_vars |= vars_data[3]
+        for i, keys in vars_data[3].items():
+            x_of_item_vars_keys[i] += keys
+        x_vars |= vars_data[4]
 
 
-    return (x_vars_names, x_vars_keys, x_of_bin_vars_keys, x_vars)
+    return (
+        x_vars_names, 
+        x_vars_keys, 
+        x_of_bin_vars_keys, 
+        x_of_item_vars_keys, 
+        x_vars
+    )
 
 
 def create_z_vars(model, number_of_bins):
@@ -177,7 +354,7 @@ def create_z_vars(model, number_of_bins):
 
 
 def create_b_vars(model, items, number_of_bins):
-    '''Create master b variables. Master model only.'''
+    '''Create master b variables, the number of copies of item i allocated on bin j. Master model only.'''
 
     # Variable name on gurobi
     b_vars_names = {}
@@ -185,12 +362,39 @@ def create_b_vars(model, items, number_of_bins):
     b_vars = {}
     
     for i in items.keys():
+        vtype = GRB.BINARY if (items[i]["demand"] == 1) else GRB.INTEGER
         for j in range(1, number_of_bins+1):
             var_name = "b_" + str(i) + "_" + str(j)
             b_vars_names[i, j] = var_name
-            b_vars[i, j] = model.addVar(name=var_name, vtype=GRB.BINARY)
+            b_vars[i, j] = model.addVar(
+                ub=items[i]["demand"],
+                name=var_name, 
+                vtype=vtype
+            )
     return (b_vars_names, b_vars)
 
+
+def create_y_vars(model, items, number_of_bins):
+    '''Create master y variables, y_{i,j,k} = 1 if at least k copies of item i are allocated on bin j. They are created only for the items with demand > 1, since y_{i,j,1} = b_{i,j} otherwise. Master model only.'''
+
+    # Variable name on gurobi
+    y_vars_names = {}
+    # Dictionary of variables. Format -> {(i,j,k) : variable}
+    y_vars = {}
+    
+    for i in items.keys():
+        if (items[i]["demand"] == 1):
+            continue
+        for j in range(1, number_of_bins+1):
+            for k in range(1, items[i]["demand"]+1):
+                var_name = "y_" + str(i) + "_" + str(j) + "_" + str(k)
+                y_vars_names[i, j, k] = var_name
+                y_vars[i, j, k] = model.addVar(
+                    name=var_name, 
+                    vtype=GRB.BINARY
+                )
+    return (y_vars_names, y_vars)
+
 ################################################################################
 # Constraints creation functions starts below
 ################################################################################
@@ -198,11 +402,9 @@ def create_b_vars(model, items, number_of_bins):
 
 def create_standard_bin_not_used_constr(
     model, 
-    items,
     number_of_bins,
-    bin_width,
-    bin_height,
     x_vars,
+    x_of_bin_vars_keys,
     z_vars
 ):
     '''Cutting constraints to avoid that a bin is used without any item being allocated to it. Standard model only.'''
@@ -214,14 +416,8 @@ def create_standard_bin_not_used_constr(
     for j in range(1, number_of_bins+1):
         constr[j] = model.addConstr(
             quicksum(
-                quicksum(
-                    quicksum(
-                        x_vars[i,j,l,w]
-                        for w in range(bin_height - items[i]["height"] + 1)
-                    )
-                    for l in range(bin_width - items[i]["width"] + 1)
-                )
-                for i in items.keys()
+                x_vars[key]
+                for key in x_of_bin_vars_keys[j]
             )
             >=
             z_vars[j],
@@ -233,64 +429,64 @@ def create_standard_bin_not_used_constr(
 
 def create_bin_overlapping_constr(
     model, 
-    bin_width,
-    bin_height,
     j,
-    keys,
+    cells_index,
     x_vars,
-    z,
-    point_is_cutted
+    z
 ):
     '''Create the overlapping constraint for a bin j. Standard and subproblem models only.'''
 
     constr = {}
     # For bin j, for each r \in bin_width, for each s \in bin_height
     # \sum_{i = 1}^{m}{\sum_{l \in X}{\sum_{w \in Y}{a_{i,l,w,r,s} * x_{i,j,l,w}} \leq z_{j}
-    for r in range(bin_width):
-        for s in range(bin_height):
-            # Create a list with all variables of the constraint
-            vars_constr = []
-            for k in keys:
-                i, c, l, w = k
-                if ((i, l, w, r, s) in point_is_cutted):
-                    vars_constr.append(x_vars[i, j, l, w])
-            # If there is at least one variable, create constraint
-            if (len(vars_constr) > 0):
-                constr[j,r,s] = model.addConstr(
-                    quicksum(vars_constr) <= z,
-                    name=(
-                        "bin_overlapping_constr_" 
-                        + str(j) + "_" 
-                        + str(r) + "_" 
-                        + str(s)
-                    )
-                )
+    # Only the points (r,s) cutted by at least one placement are on the index
+    for r, s in sorted(cells_index.keys()):
+        # Create a list with all variables of the constraint
+        vars_constr = [
+            x_vars[i, j, l, w] 
+            for i, l, w in cells_index[r, s]
+        ]
+        constr[j,r,s] = model.addConstr(
+            quicksum(vars_constr) <= z,
+            name=(
+                "bin_overlapping_constr_" 
+                + str(j) + "_" 
+                + str(r) + "_" 
+                + str(s)
+            )
+        )
     return constr
 
 
 def create_overlapping_constr(
     model, 
-    bin_width,
-    bin_height,
     x_vars,
     x_of_bin_vars_keys,
     z_vars,
-    point_is_cutted
+    coverage,
+    cells_points=None
 ):
-    '''Create the overlapping constraint for each bin. Standard model only.'''
+    '''Create the overlapping constraint for each bin. If cells_points is given, only its points are constrained (see create_cells_index). Standard model only.'''
     overlapping_constrs = {}
+
+    # The bins are homogeneous, so the index of the points cutted by each 
+    # placement (i,l,w) is created only once and used for every bin
+    cells_index = None
     
     # For each bin j, create an overlapping constraint
     for j, keys in x_of_bin_vars_keys.items():
+        if (cells_index is None):
+            cells_index = create_cells_index(
+                coverage, 
+                [(i, l, w) for i, c, l, w in keys],
+                cells_points
+            )
         overlapping_constrs |= create_bin_overlapping_constr(
             model, 
-            bin_width, 
-            bin_height,
             j,
-            keys,
+            cells_index,
             x_vars,
-            z_vars[j],
-            point_is_cutted
+            z_vars[j]
         )
 
     return overlapping_constrs
@@ -300,25 +496,20 @@ def create_all_items_must_be_allocated_constr(
     model,
     items,
     x_vars,
+    x_of_item_vars_keys
 ):
-    '''For each item create a constraint to force its allocation. Standard and subproblem models only.'''
+    '''For each item create a constraint to force the allocation of its copies. Standard and subproblem models only.'''
     must_be_allocated_constrs = {}
 
     for i in items.keys():
-        # Create a list with all variables of the constraint
-        items_for_constr = []
-        for key in x_vars.keys():
-            if (key[0] == i):
-                items_for_constr.append(x_vars[key])
-        
-        # Create constraint
+        # Create constraint with the variables of item i
         must_be_allocated_constrs[i] = model.addConstr(
             quicksum(
-                item
-                for item in items_for_constr
+                x_vars[key]
+                for key in x_of_item_vars_keys[i]
             )
             ==
-            1,
+            items[i]["demand"],
             name=(
                 "must_be_allocated_constrs_" 
                 + str(i)
@@ -424,19 +615,63 @@ def create_all_items_must_be_on_a_bin_constr(
     number_of_bins,
     b_vars
 ):
-    '''For each item create a constraint to force its allocation. Master model only.'''
+    '''For each item create a constraint to force the allocation of its copies. Master model only.'''
     constr = {}
     for i in items.keys():
         constr[i] = model.addConstr(
-            quicksum(b_vars[i,j] for j in range(1, number_of_bins+1)) == 1,
+            quicksum(b_vars[i,j] for j in range(1, number_of_bins+1)) 
+            == 
+            items[i]["demand"],
             name="all_items_must_be_on_a_bin_" + str(i)
         )
     return constr
 
+
+def create_copies_constr(
+    model,
+    items,
+    number_of_bins,
+    b_vars,
+    y_vars
+):
+    '''Link the y variables to the b variables with b_{i,j} = sum_{k}{y_{i,j,k}} and y_{i,j,k} >= y_{i,j,k+1}, so y_{i,j,k} = 1 if, and only if, b_{i,j} >= k. Master model only.'''
+    constr = {}
+    for i in items.keys():
+        if (items[i]["demand"] == 1):
+            continue
+        for j in range(1, number_of_bins+1):
+            constr[i, j] = model.addConstr(
+                quicksum(
+                    y_vars[i, j, k] 
+                    for k in range(1, items[i]["demand"]+1)
+                ) 
+                == 
+                b_vars[i, j],
+                name="copies_constr_" + str(i) + "_" + str(j)
+            )
+            for k in range(1, items[i]["demand"]):
+                constr[i, j, k] = model.addConstr(
+                    y_vars[i, j, k] >= y_vars[i, j, k+1],
+                    name=(
+                        "copies_order_constr_" 
+                        + str(i) + "_" 
+                        + str(j) + "_" 
+                        + str(k)
+                    )
+                )
+    return constr
+
 ################################################################################
 # Callback related functions starts below
 ################################################################################
 
+def get_copies_indicator_var(model, i, j, copies):
+    '''Returns the variable that is 1 if, and only if, at least copies copies of item i are allocated on bin j'''
+    if (model._items[i]["demand"] == 1):
+        return model._b_vars[i, j]
+    return model._y_vars[i, j, copies]
+
+
 def create_feasibility_cut_expr_for_j(
     model, 
     j,
@@ -444,13 +679,20 @@ def create_feasibility_cut_expr_for_j(
 ):
     '''Create the expression of a feasibility cut for a bin j'''
     
-    # Create a dictionary for the variables b[i,j] with b*[i,j] = 1, where 
-    # b*[i,j] is the previous solution value
+    # Create a dictionary for the variables that indicate whether at least 
+    # b*[i,j] copies of item i are allocated on bin j, where b*[i,j] is the 
+    # previous solution value
     allocated_bins = {}
-    for key, b_var in subproblem_inf_sol.items():
-        if (b_var > 0.5):
+    for key, b_value in subproblem_inf_sol.items():
+        copies = round(b_value)
+        if (copies > 0):
             i, k = key
-            allocated_bins[i, j] = model._b_vars[i, j]
+            allocated_bins[i, j] = get_copies_indicator_var(
+                model, 
+                i, 
+                j, 
+                copies
+            )
 
     # Create constraint expression
     constr_expr = {}
@@ -481,22 +723,46 @@ def create_feasibility_cut_expr_for_subproblem(
     return constr_expr
 
 
-def solve_subproblem_j(
+def get_subproblem_placement(subproblem_model):
+    '''Returns the placement [(i,l,w), ...] of the items on the solution of a subproblem model'''
+    keys = list(subproblem_model._x_vars.keys())
+    values = subproblem_model.getAttr(
+        "X", 
+        list(subproblem_model._x_vars.values())
+    )
+    return [
+        (i, l, w)
+        for (i, j, l, w), value in zip(keys, values)
+        if (value > 0.5)
+    ]
+
+
+def create_subproblem_inf(j, items):
+    '''Returns the number of copies b[i, j] of the items of an infeasible subproblem. This is used to create the feasibility cut'''
+    subproblem_inf = {}
+    for i in items.keys():
+        subproblem_inf[i, j] = items[i]["demand"]
+    return subproblem_inf
+
+
+def solve_subproblem_mip(
     j, 
     items, 
     bin_height, 
     bin_width, 
-    point_is_cutted,
-    b_values,
-    model,
-    cb_start_time
+    coverage,
+    time_limit,
+    manager=None
 ):
-    '''Solve the subproblem of bin j'''
-
-    # If there is no item allocated on bin j, then there is no problem
-    if (len(items) <= 0):
-        # print("Not allocated in bin " + str(j))
-        return {"feasible" : {}, "infeasible" : {}}
+    '''Solve the subproblem of bin j with the grid MIP model (see create_subproblem). If a subproblem manager is given, its template model is used. Otherwise, a new model is created with the default Gurobi environment. Returns a tuple (feasible, placement) as solve_subproblem_j.'''
+    if (manager is not None):
+        return solve_subproblem_on_template(
+            manager, 
+            items, 
+            bin_height, 
+            bin_width, 
+            time_limit
+        )
     
     # Create model
     subproblem_model = create_subproblem(
@@ -504,43 +770,189 @@ def solve_subproblem_j(
         items, 
         bin_height, 
         bin_width, 
-        point_is_cutted, 
+        coverage, 
         "subproblem_" + str(j),
-        1
+        time_limit
     )
-    
-    if (model.Params.TimeLimit - model.cbGet(GRB.Callback.RUNTIME) <= 0):
-        model.terminate()
-        model._subproblems_incomplete = True
-        return {"feasible" : {}, "infeasible" : {}}
 
-
-    subproblem_model.Params.TimeLimit = (
-        model.Params.TimeLimit - model.cbGet(GRB.Callback.RUNTIME)
-    )
     subproblem_model.Params.OutputFlag = 0
     subproblem_model.optimize()
     
-    # If it is infeasible, get the variables b[i, j], that is, the value of the 
-    # variables that indicate wheter an item i was allocated on bin j. 
-    # This is used to create the feasibility cut
     if (subproblem_model.status == GRB.INFEASIBLE):
-        subproblem_inf = {}
-        for i in items.keys():
-            subproblem_inf[i, j] = b_values[i, j]
-        return {"feasible" : {}, "infeasible" : subproblem_inf}
+        subproblem_model.dispose()
+        return (False, [])
     
     if (feasible_not_found(subproblem_model)):
-        model.terminate()
-        model._subproblems_incomplete = True
-        return {"feasible" : {}, "infeasible" : {}}
-    # If there is a solution, then create a dictionary with the solutions
-    subproblem_solution = {
-        var.VarName : var.x 
-        for var in subproblem_model.getVars()
+        subproblem_model.dispose()
+        return (None, [])
+
+    # If there is a solution, then get the position of the items
+    placement = get_subproblem_placement(subproblem_model)
+    subproblem_model.dispose()
+
+    return (True, placement)
+
+
+# Exact methods to solve a subproblem. Each one receives 
+# (j, items, bin_height, bin_width, coverage, time_limit, manager) and returns 
+# (feasible, placement) as solve_subproblem_j
+SUBPROBLEM_BACKENDS = {
+    "mip": solve_subproblem_mip,
+    "cpsat": solve_subproblem_cpsat,
+    "bitboard": solve_subproblem_bitboard,
+}
+
+
+def solve_subproblem_j(
+    j, 
+    items, 
+    bin_height, 
+    bin_width, 
+    coverage,
+    time_limit,
+    subproblem_params,
+    manager=None
+):
+    '''Solve the subproblem of bin j. The demand of each item is the number of its copies allocated on the bin. Returns a tuple (feasible, placement), where feasible is True if the items fit on the bin, False if they do not fit and None if the time limit was reached before an answer. The placement [(i,l,w), ...] is empty if feasible is not True. The master model is not accessed, so it can run outside the callback thread.'''
+
+    # The heuristics and the filters handle each copy of an item as a 
+    # different item
+    copies = expand_items(items)
+
+    # Most of the bins are easily packed, so try the packing heuristics 
+    # before the exact method
+    if (subproblem_params["heuristics"]):
+        placement = pack_heuristically(copies, bin_width, bin_height)
+        if (placement is not None):
+            return (True, collapse_placement(placement))
+
+    # Try to prove that the items do not fit using fast necessary conditions
+    if (subproblem_params["filters"]):
+        if (bin_is_infeasible(copies, bin_width, bin_height)):
+            return (False, [])
+
+    # Solve the subproblem with the exact method of the run
+    solve_exactly = SUBPROBLEM_BACKENDS[subproblem_params["backend"]]
+    return solve_exactly(
+        j, 
+        items, 
+        bin_height, 
+        bin_width, 
+        coverage, 
+        time_limit, 
+        manager
+    )
+
+
+def create_worker_manager(managers, items, bin_height, bin_width, coverage):
+    '''Create the subproblem manager of a worker thread of the subproblems pool and add it to the managers of the pool'''
+    # The parallelism is given by the workers
+    _worker_data.manager = create_subproblem_manager(
+        items, 
+        bin_height, 
+        bin_width, 
+        coverage, 
+        threads=1
+    )
+    managers.append(_worker_data.manager)
+
+
+def create_subproblem_pool(
+    number_of_workers, 
+    items, 
+    bin_height, 
+    bin_width, 
+    coverage
+):
+    '''Create a pool of threads to solve the subproblems in parallel. Each worker has its own subproblem manager, with its own Gurobi environment. Returns None if number_of_workers <= 1.
+
+    The pool dictionary is structured as follow:
+    - pool["executor"]: executor of the worker threads
+    - pool["managers"]: list of the subproblem managers of the workers, created when each worker starts (see dispose_subproblem_pool)
+    '''
+    if (number_of_workers <= 1):
+        return None
+    managers = []
+    return {
+        "executor": concurrent.futures.ThreadPoolExecutor(
+            max_workers=number_of_workers,
+            initializer=create_worker_manager,
+            initargs=(managers, items, bin_height, bin_width, coverage)
+        ),
+        "managers": managers
     }
 
-    return {"feasible" : subproblem_solution, "infeasible" : {}}
+
+def dispose_subproblem_pool(pool):
+    '''Stop the workers of a pool, cancelling the subproblems not started, and free the subproblem managers of the workers'''
+    pool["executor"].shutdown(cancel_futures=True)
+    for manager in pool["managers"]:
+        dispose_subproblem_manager(manager)
+    pool["managers"].clear()
+
+
+def solve_subproblem_on_worker(
+    j, 
+    items, 
+    bin_height, 
+    bin_width, 
+    coverage, 
+    deadline,
+    subproblem_params
+):
+    '''Solve the subproblem of bin j using the subproblem manager of the current worker. The time limit is the time left until the deadline, so a subproblem that starts late on the queue does not run after it. Returns (None, []) if the deadline has passed.'''
+    time_limit = deadline - time.time()
+    if (time_limit <= 0):
+        return (None, [])
+    return solve_subproblem_j(
+        j, 
+        items, 
+        bin_height, 
+        bin_width, 
+        coverage, 
+        time_limit, 
+        subproblem_params,
+        _worker_data.manager
+    )
+
+
+def solve_subproblems_in_parallel(
+    subproblems_to_solve,
+    bin_height,
+    bin_width,
+    coverage,
+    time_limit,
+    subproblem_params,
+    pool
+):
+    '''Solve the subproblems {j : items} on the workers of the pool. Returns {j : (feasible, placement)}. If a subproblem is not solved until the time limit, its result is (None, []).'''
+    # Every subproblem must end until the deadline, so the workers are free 
+    # when the callback returns
+    deadline = time.time() + time_limit
+    futures = {
+        j : pool["executor"].submit(
+            solve_subproblem_on_worker,
+            j, 
+            items,
+            bin_height,
+            bin_width,
+            coverage,
+            deadline,
+            subproblem_params
+        )
+        for j, items in subproblems_to_solve.items()
+    }
+
+    concurrent.futures.wait(futures.values(), timeout=time_limit)
+
+    results = {}
+    for j, future in futures.items():
+        if (future.done()):
+            results[j] = future.result()
+        else:
+            future.cancel()
+            results[j] = (None, [])
+    return results
 
 
 def solve_subproblems(
@@ -548,7 +960,7 @@ def solve_subproblems(
     number_of_bins,
     bin_height,
     bin_width,
-    point_is_cutted,
+    coverage,
     b_values,
     model,
     cb_start_time
@@ -556,59 +968,246 @@ def solve_subproblems(
     '''Solve the subproblem of each bin'''
     
     subproblems_sol = {"infeasible" : {}, "feasible" : {}}
+    # Items allocated on each bin. Format -> {j : items}
+    items_of_bin = {}
+    # Result (feasible, placement) of each subproblem
+    results = {}
+    # Items of the subproblems that are not on the cache. Format -> {j : items}
+    subproblems_to_solve = {}
+    # Bins with the same dimensions of items of a subproblem to solve
+    bins_of_key = {}
     # For each subproblem
     for j in range(1, number_of_bins+1):
         # Create a dictionary with the items allocated on the bin (an item is 
-        # allocated if b[i,j] is 1)
+        # allocated if b[i,j] >= 1). The demand of each item is b[i,j]
         items = {
-            i : item
+            i : item | {"demand" : round(b_values[i, j])}
             for i, item in all_items.items()
             if (b_values[i, j] > 0.5)
         }
+
+        # If there is no item allocated on bin j, then there is no problem
+        if (len(items) <= 0):
+            continue
+        items_of_bin[j] = items
         
-        # Solve subproblem
-        solutions = solve_subproblem_j(
-            j, 
-            items,
+        # The bins are homogeneous, so bins with the same dimensions of items 
+        # have the same result. Each one is solved only once
+        cache_key = get_cache_key(items)
+        if (cache_key in bins_of_key):
+            bins_of_key[cache_key].append((j, items))
+            continue
+
+        cached_result = get_cached_result(model._subproblem_cache, cache_key)
+        if (cached_result is not None):
+            feasible, positions = cached_result
+            results[j] = (feasible, positions_to_placement(items, positions))
+            continue
+
+        bins_of_key[cache_key] = [(j, items)]
+        subproblems_to_solve[j] = items
+
+    # Solve the subproblems that are not on the cache
+    solve_start_time = time.time()
+    if (model._subproblem_pool is not None and len(subproblems_to_solve) > 1):
+        time_limit = model.Params.TimeLimit - model.cbGet(GRB.Callback.RUNTIME)
+        if (time_limit <= 0):
+            model.terminate()
+            model._subproblems_incomplete = True
+            return subproblems_sol
+        results |= solve_subproblems_in_parallel(
+            subproblems_to_solve,
             bin_height,
             bin_width,
-            point_is_cutted,
-            b_values,
-            model,
-            cb_start_time
+            coverage,
+            time_limit,
+            model._subproblem_params,
+            model._subproblem_pool
         )
+    else:
+        for j, items in subproblems_to_solve.items():
+            time_limit = (
+                model.Params.TimeLimit - model.cbGet(GRB.Callback.RUNTIME)
+            )
+            if (time_limit <= 0):
+                model.terminate()
+                model._subproblems_incomplete = True
+                return subproblems_sol
+            results[j] = solve_subproblem_j(
+                j, 
+                items,
+                bin_height,
+                bin_width,
+                coverage,
+                time_limit,
+                model._subproblem_params,
+                model._subproblem_manager
+            )
+
+    model._subproblems_time += time.time() - solve_start_time
 
-        # If solution is feasible, store as a feasible solution
-        if (len(solutions["feasible"]) > 0):
-            subproblems_sol["feasible"][j] = solutions["feasible"]
-        # If solution is infeasible, store as an infeasible solution
-        if (len(solutions["infeasible"]) > 0):
-            subproblems_sol["infeasible"][j] = solutions["infeasible"]
+    # Store the results on the cache and share them with the bins with the 
+    # same dimensions of items
+    for cache_key, bins in bins_of_key.items():
+        first_j, first_items = bins[0]
+        feasible, placement = results[first_j]
+        if (feasible is None):
+            model.terminate()
+            model._subproblems_incomplete = True
+            return subproblems_sol
+        positions = []
+        if (feasible):
+            positions = placement_to_positions(first_items, placement)
+        store_result(model._subproblem_cache, cache_key, feasible, positions)
+        for j, items in bins[1:]:
+            results[j] = (feasible, positions_to_placement(items, positions))
+
+    # The solutions are stored following the order of the bins
+    for j in sorted(results.keys()):
+        feasible, placement = results[j]
+        # If solution is feasible, store its placement
+        if (feasible):
+            subproblems_sol["feasible"][j] = placement
+        # If solution is infeasible, store the values b[i, j], that is, 
+        # the number of copies of item i allocated on bin j. This is used to 
+        # create the feasibility cut
+        else:
+            items = items_of_bin[j]
+            # The cut is stronger with less items
+            if (model._subproblem_params["cut_strengthening"]):
+                strengthening_start_time = time.time()
+                items = get_minimal_infeasible_items(
+                    items,
+                    bin_height,
+                    bin_width,
+                    coverage,
+                    model
+                )
+                model._subproblems_time += (
+                    time.time() - strengthening_start_time
+                )
+            subproblems_sol["infeasible"][j] = create_subproblem_inf(
+                j, 
+                items
+            )
 
     # Return the feasible and infeasible solutions
     return subproblems_sol
 
 
+def subproblem_is_infeasible(
+    items, 
+    bin_height, 
+    bin_width, 
+    coverage, 
+    model
+):
+    '''True, if it is proven that the items do not fit on one bin. The exact method runs with the time limit of the cut strengthening, and False is returned if it is reached.'''
+    cache_key = get_cache_key(items)
+    cached_result = get_cached_result(model._subproblem_cache, cache_key)
+    if (cached_result is not None):
+        return not cached_result[0]
+
+    time_limit = min(
+        model._subproblem_params["cut_strengthening_time_limit"],
+        model.Params.TimeLimit - model.cbGet(GRB.Callback.RUNTIME)
+    )
+    if (time_limit <= 0):
+        return False
+
+    feasible, placement = solve_subproblem_j(
+        0,
+        items,
+        bin_height,
+        bin_width,
+        coverage,
+        time_limit,
+        model._subproblem_params,
+        model._subproblem_manager
+    )
+    if (feasible is None):
+        return False
+
+    positions = []
+    if (feasible):
+        positions = placement_to_positions(items, placement)
+    store_result(model._subproblem_cache, cache_key, feasible, positions)
+
+    return not feasible
+
+
+def get_minimal_infeasible_items(
+    items, 
+    bin_height, 
+    bin_width, 
+    coverage, 
+    model
+):
+    '''Deletion filter over the copies of the items of an infeasible subproblem. Each copy is removed if the remaining copies are still proven infeasible, from the smallest to the largest area. Returns the remaining items, with the demand reduced to the remaining copies, that are a minimal infeasible subset if every check is answered within the time limit of the cut strengthening.'''
+    minimal_items = dict(items)
+    items_ids = sorted(
+        items.keys(),
+        key=lambda i: (items[i]["width"] * items[i]["height"], i)
+    )
+    for i in items_ids:
+        # If a copy of item i is needed, then the next copies are also 
+        # needed, since less items fit on the bin
+        while (i in minimal_items):
+            if (sum(item["demand"] for item in minimal_items.values()) <= 1):
+                return minimal_items
+            candidate_items = dict(minimal_items)
+            if (minimal_items[i]["demand"] == 1):
+                del candidate_items[i]
+            else:
+                candidate_items[i] = minimal_items[i] | {
+                    "demand" : minimal_items[i]["demand"] - 1
+                }
+            if (not subproblem_is_infeasible(
+                candidate_items, 
+                bin_height, 
+                bin_width, 
+                coverage, 
+                model
+            )):
+                break
+            minimal_items = candidate_items
+    
+    return minimal_items
+
+
 def add_benders_cuts(
     model,
     subproblems_inf
 ):
     '''Create a benders cut for each infeasible subproblem'''
+
+    # Cuts already posted on this callback
+    posted_cuts = set()
     
     # For each infeasible subproblem
     for j in subproblems_inf.keys():
         if (len(subproblems_inf[j]) == 0):
             continue
+        # Add the items of the cut to the pool. If the pool has a stronger 
+        # cut, then it is posted instead
+        cut = tuple(sorted(
+            (i, round(b_value))
+            for (i, k), b_value in subproblems_inf[j].items()
+            if (b_value > 0.5)
+        ))
+        cut = add_cut(model._cut_pool, cut)
+        if (cut in posted_cuts):
+            continue
+        posted_cuts.add(cut)
         # Create the feasibility cut for the subproblem for each bin
         feasibility_cuts_expr = create_feasibility_cut_expr_for_subproblem(
             model, 
             model._number_of_bins,
-            subproblems_inf[j]
+            {(i, j) : copies for i, copies in cut}
         )
         # add lazy constraints
         for expr in feasibility_cuts_expr.values():
             model.cbLazy(expr)
-            model._lazy_set.add(expr)
 
 
 def master_call_back(model, where):
@@ -627,7 +1226,7 @@ def master_call_back(model, where):
                 model._number_of_bins,
                 model._bin_height,
                 model._bin_width,
-                model._point_is_cutted,
+                model._coverage,
                 b_values,
                 model,
                 cb_start_time
@@ -642,11 +1241,10 @@ def master_call_back(model, where):
                     model,
                     subproblems_sol["infeasible"],
                 )
-            # Otherwise, get store the values of the feasible solution of the subproblem
+            # Otherwise, store the placements of the feasible solution of 
+            # the subproblems
             else:
-                model._x_vars = {}
-                for j, solutions_vars in subproblems_sol["feasible"].items():
-                    model._x_vars |= solutions_vars
+                model._solution_placements = subproblems_sol["feasible"]
             model._cb_total_time += time.time() - cb_start_time
         except Exception as ex:
             # Terminate model if an error occurs
@@ -655,6 +1253,203 @@ def master_call_back(model, where):
 
 
 
+################################################################################
+# Subproblem manager related functions starts below
+################################################################################
+
+def create_subproblem_env(threads=0):
+    '''Create a Gurobi environment for the subproblem models. The parameters are set once on the environment instead of on each model. The subproblems are feasibility problems, so the search stops on the first solution.'''
+    env = Env(empty=True)
+    env.setParam("OutputFlag", 0)
+    env.setParam("Threads", threads)
+    env.setParam("SolutionLimit", 1)
+    env.setParam("MIPFocus", 1)
+    env.start()
+    return env
+
+
+def create_subproblem_manager(
+    items, 
+    bin_height, 
+    bin_width, 
+    coverage, 
+    threads=0
+):
+    '''Create a manager of the subproblem models. The models are not rebuilt for each subproblem: a template model with all items is created for each bin size, and each subproblem only changes the bounds and the right-hand sides of the template. A manager must be used by one thread only.
+
+    The manager dictionary is structured as follow:
+    - manager["env"]: Gurobi environment shared by the template models
+    - manager["items"]: items of the instance
+    - manager["coverage"]: coverage data of the instance (see coverage_manager)
+    - manager["templates"]: dictionary {(bin_width, bin_height) : template model}
+    '''
+    return {
+        "env": create_subproblem_env(threads),
+        "items": items,
+        "coverage": coverage,
+        "templates": {}
+    }
+
+
+def dispose_subproblem_manager(manager):
+    '''Free the template models and the environment of a manager'''
+    for template in manager["templates"].values():
+        template.dispose()
+    manager["templates"] = {}
+    manager["env"].dispose()
+
+
+def get_subproblem_template(manager, bin_height, bin_width):
+    '''Returns the template model of a bin size, creating it on the first call. The template has the variables and constraints of all items, with every item inactive.'''
+    key = (bin_width, bin_height)
+    if (key not in manager["templates"]):
+        template = create_subproblem(
+            0, 
+            manager["items"], 
+            bin_height, 
+            bin_width, 
+            manager["coverage"], 
+            "subproblem_template",
+            GRB.INFINITY,
+            manager["env"]
+        )
+        # Demand of each item on the template
+        template._demands = dict.fromkeys(manager["items"].keys(), None)
+        manager["templates"][key] = template
+    return manager["templates"][key]
+
+
+def activate_template_items(template, items):
+    '''Set the demands of a template model to the demands of the items. The allocation constraints of the other items have right-hand side 0 and their variables have upper bound 0. Only the items with a new demand are changed.'''
+    constrs = []
+    rhs = []
+    variables = []
+    upper_bounds = []
+    for i, demand in template._demands.items():
+        new_demand = items[i]["demand"] if (i in items) else 0
+        if (new_demand == demand):
+            continue
+        constrs.append(template._must_be_allocated_constrs[i])
+        rhs.append(new_demand)
+        if (demand is None or (demand > 0) != (new_demand > 0)):
+            upper_bound = 1 if (new_demand > 0) else 0
+            variables += template._x_of_item_vars[i]
+            upper_bounds += [upper_bound] * len(template._x_of_item_vars[i])
+        template._demands[i] = new_demand
+
+    template.setAttr("RHS", constrs, rhs)
+    template.setAttr("UB", variables, upper_bounds)
+
+
+def solve_subproblem_on_template(
+    manager, 
+    items, 
+    bin_height, 
+    bin_width, 
+    time_limit
+):
+    '''Solve a subproblem with the template model of the manager. The time to create the template is part of the time limit. Returns a tuple (feasible, placement) as solve_subproblem_j.'''
+    start_time = time.time()
+    template = get_subproblem_template(manager, bin_height, bin_width)
+    activate_template_items(template, items)
+    time_limit -= time.time() - start_time
+    if (time_limit <= 0):
+        return (None, [])
+    template.Params.TimeLimit = time_limit
+    template.optimize()
+
+    if (template.status == GRB.INFEASIBLE):
+        return (False, [])
+
+    if (feasible_not_found(template)):
+        return (None, [])
+
+    # If there is a solution, then get the position of the items. Only the 
+    # variables of the items of the subproblem are read
+    placement = []
+    for i in items.keys():
+        values = template.getAttr("X", template._x_of_item_vars[i])
+        placement += [
+            (i, l, w)
+            for (i, j, l, w), value in zip(
+                template._x_of_item_vars_keys[i], 
+                values
+            )
+            if (value > 0.5)
+        ]
+    return (True, placement)
+
+################################################################################
+# Initial solution related functions starts below
+################################################################################
+
+def set_mip_start(model, variables, start_values):
+    '''Set the MIP start of the variables {key : variable} with the values {key : value}'''
+    model.setAttr(
+        "Start", 
+        [variables[key] for key in start_values.keys()], 
+        list(start_values.values())
+    )
+
+
+def set_standard_mip_start(model, x_vars, z_vars, initial_solution):
+    '''Set the initial solution, a list with the placement [(i,l,w), ...] of each bin, as the MIP start of the standard model'''
+    x_start_values = dict.fromkeys(x_vars.keys(), 0)
+    for j, placement in enumerate(initial_solution, start=1):
+        for i, l, w in placement:
+            # The point may not be a placement point of the model, then 
+            # Gurobi tries to repair the MIP start
+            if ((i, j, l, w) in x_start_values):
+                x_start_values[i, j, l, w] = 1
+    z_start_values = {
+        j : 1 if (j <= len(initial_solution)) else 0
+        for j in z_vars.keys()
+    }
+    
+    set_mip_start(model, x_vars, x_start_values)
+    set_mip_start(model, z_vars, z_start_values)
+
+
+def set_master_mip_start(model, b_vars, y_vars, z_vars, initial_solution):
+    '''Set the initial solution, a list with the placement [(i,l,w), ...] of each bin, as the MIP start of the master model'''
+    b_start_values = dict.fromkeys(b_vars.keys(), 0)
+    for j, placement in enumerate(initial_solution, start=1):
+        for i, l, w in placement:
+            b_start_values[i, j] += 1
+    y_start_values = {
+        (i, j, k) : 1 if (k <= b_start_values[i, j]) else 0
+        for i, j, k in y_vars.keys()
+    }
+    z_start_values = {
+        j : 1 if (j <= len(initial_solution)) else 0
+        for j in z_vars.keys()
+    }
+    
+    set_mip_start(model, b_vars, b_start_values)
+    set_mip_start(model, y_vars, y_start_values)
+    set_mip_start(model, z_vars, z_start_values)
+
+
+def fix_used_bins(z_vars, lower_bound):
+    '''Fix z_{j} = 1 for j <= lower_bound, since at least lower_bound bins are used and the symmetry cuts use the first bins'''
+    for j in range(1, min(lower_bound, len(z_vars)) + 1):
+        z_vars[j].LB = 1
+
+
+def store_initial_solution_on_cache(cache, items, initial_solution):
+    '''Store the bins of the initial solution as feasible results of the subproblems cache'''
+    for placement in initial_solution:
+        bin_items = {}
+        for i, l, w in placement:
+            copies = bin_items.get(i, {"demand" : 0})["demand"]
+            bin_items[i] = items[i] | {"demand" : copies + 1}
+        store_result(
+            cache, 
+            get_cache_key(bin_items), 
+            True, 
+            placement_to_positions(bin_items, placement)
+        )
+
 ################################################################################
 # Model creation related functions starts below
 ################################################################################
@@ -666,19 +1461,41 @@ def create_standard_model(
     bin_width, 
     items_areas,
     bin_area,
-    point_is_cutted, 
+    coverage, 
     number_of_bins,
     model_name,
     log_path,
-    time_limit
+    time_limit,
+    initial_solution=None,
+    lower_bound=0,
+    threads=0
 ):
-    '''Create standard model, that is, the complete model.'''
+    '''Create standard model, that is, the complete model. If initial_solution (list with the placement [(i,l,w), ...] of each bin) is given, it is used as MIP start. The first lower_bound bins are fixed as used. Gurobi uses at most threads threads (0 to let Gurobi choose).'''
     
     model = Model(name=model_name)
+
+    # Points where the left bottom of the items can be placed
+    placement_points = create_placement_points(
+        items, 
+        bin_width, 
+        bin_height, 
+        coverage["placement_points"]
+    )
     
     # Create variables
-    x_vars_names, x_vars_keys, x_of_bin_vars_keys, x_vars = create_x_vars(
-        model, items, bin_height, bin_width, number_of_bins
+    (
+        x_vars_names, 
+        x_vars_keys, 
+        x_of_bin_vars_keys, 
+        x_of_item_vars_keys, 
+        x_vars
+    ) = create_x_vars(
+        model, 
+        items, 
+        bin_height, 
+        bin_width, 
+        number_of_bins, 
+        placement_points
     )
     z_vars_names, z_vars = create_z_vars(
         model, number_of_bins
@@ -694,18 +1511,18 @@ def create_standard_model(
 
     overlapping_constrs = create_overlapping_constr(
         model, 
-        bin_width,
-        bin_height,
         x_vars,
         x_of_bin_vars_keys,
         z_vars,
-        point_is_cutted
+        coverage,
+        get_cells_points(placement_points)
     )
 
     must_be_allocated_constrs = create_all_items_must_be_allocated_constr(
         model,
         items,
         x_vars,
+        x_of_item_vars_keys
     )
 
     items_areas_constr = create_items_areas_constr(
@@ -720,60 +1537,300 @@ def create_standard_model(
 
     bins_not_used = create_standard_bin_not_used_constr(
         model,
-        items,
         number_of_bins,
-        bin_width,
-        bin_height,
         x_vars,
+        x_of_bin_vars_keys,
         z_vars
     )
 
+    fix_used_bins(z_vars, lower_bound)
+
+    if (initial_solution is not None):
+        set_standard_mip_start(model, x_vars, z_vars, initial_solution)
+
+    # Keys and variables used to decode the solution
+    model._x_keys = list(x_vars.keys())
+    model._x_list = list(x_vars.values())
+    model._z_vars = z_vars
+
     model._cb_total_time = 0
-    set_parameters(model, time_limit=time_limit, log_path=log_path)
+    set_parameters(
+        model, 
+        time_limit=time_limit, 
+        log_path=log_path, 
+        threads=threads
+    )
 
     return model
 
 
-def create_subproblem(
-    j,
+def create_placements_arrays(items, placement_points):
+    '''Returns a tuple of lists (items ids, l values, w values) with the placements (i,l,w) of the items on one bin, ordered by item, l and w'''
+    items_ids = []
+    l_values = []
+    w_values = []
+    for i in items.keys():
+        for l in placement_points["x"][i]:
+            for w in placement_points["y"][i]:
+                items_ids.append(i)
+                l_values.append(l)
+                w_values.append(w)
+    return (items_ids, l_values, w_values)
+
+
+def create_standard_model_matrix(
     items, 
     bin_height, 
     bin_width, 
-    point_is_cutted, 
+    items_areas,
+    bin_area,
+    coverage, 
+    number_of_bins,
     model_name,
-    time_limit
+    log_path,
+    time_limit,
+    initial_solution=None,
+    lower_bound=0,
+    names=False,
+    threads=0
 ):
-    '''Create a subproblem model.'''
+    '''Create the standard model with the matrix API. The model is the same of create_standard_model, but the coefficients of each group of constraints are assembled as a sparse matrix and added in bulk. The variables are the arrays x, where x[(j-1) * P + p] is the variable of placement p (see create_placements_arrays) on bin j, and z, where z[j-1] is the variable of bin j. If names is True, the variables and the constraints are named (used to debug with print_model). Otherwise, the names are created only when the solution is read.'''
+
     model = Model(name=model_name)
 
+    # Points where the left bottom of the items can be placed
+    placement_points = create_placement_points(
+        items, 
+        bin_width, 
+        bin_height, 
+        coverage["placement_points"]
+    )
+    placements = create_placements_arrays(items, placement_points)
+    items_ids, l_values, w_values = placements
+    number_of_placements = len(items_ids)
+    bins_identity = scipy.sparse.identity(number_of_bins, format="csr")
+
     # Create variables
-    x_vars_names, x_vars_keys, x_of_bin_vars_keys, x_vars = create_x_j_vars(
-        model, items, bin_height, bin_width, j
+    x_names = ""
+    z_names = ""
+    if (names):
+        x_names = [
+            get_x_var_name(i, j, l, w)
+            for j in range(1, number_of_bins+1)
+            for i, l, w in zip(items_ids, l_values, w_values)
+        ]
+        z_names = ["z_" + str(j) for j in range(1, number_of_bins+1)]
+    x = model.addMVar(
+        number_of_bins * number_of_placements, 
+        vtype=GRB.BINARY, 
+        name=x_names
     )
-    # Create objective function as 0, since it is an feasiblity problem
+    # The first lower_bound bins are used
+    z_lower_bounds = numpy.zeros(number_of_bins)
+    z_lower_bounds[:min(lower_bound, number_of_bins)] = 1
+    z = model.addMVar(
+        number_of_bins, 
+        lb=z_lower_bounds, 
+        vtype=GRB.BINARY, 
+        name=z_names
+    )
+
+    # Create objective function as sum_{j \in P}{j * z_{j}}
     model.setObjective(
-        0,
+        numpy.arange(1, number_of_bins+1) @ z,
         sense=GRB.MINIMIZE
     )
 
     # Create constraints
-    overlapping_constrs = create_bin_overlapping_constr(
+
+    # Overlapping: for each bin j and point (r,s), 
+    # \sum_{i,l,w}{a_{i,l,w,r,s} * x_{i,j,l,w}} <= z_{j}
+    cells_matrix = create_cells_matrix(
+        coverage, 
+        (
+            numpy.asarray(items_ids, dtype=numpy.int64), 
+            numpy.asarray(l_values, dtype=numpy.int64), 
+            numpy.asarray(w_values, dtype=numpy.int64)
+        ),
+        get_cells_points(placement_points)
+    )
+    cells_column = scipy.sparse.csr_matrix(
+        numpy.ones((cells_matrix.shape[0], 1))
+    )
+    model.addConstr(
+        scipy.sparse.kron(bins_identity, cells_matrix, format="csr") @ x 
+        <= 
+        scipy.sparse.kron(bins_identity, cells_column, format="csr") @ z,
+        name="bin_overlapping_constr" if (names) else ""
+    )
+
+    # Allocation: the copies of each item are allocated
+    item_position = {i : k for k, i in enumerate(items.keys())}
+    items_matrix = scipy.sparse.csr_matrix(
+        (
+            numpy.ones(number_of_placements), 
+            (
+                [item_position[i] for i in items_ids], 
+                numpy.arange(number_of_placements)
+            )
+        ),
+        shape=(len(items), number_of_placements)
+    )
+    model.addConstr(
+        scipy.sparse.hstack(
+            [items_matrix] * number_of_bins, 
+            format="csr"
+        ) @ x 
+        == 
+        numpy.array([item["demand"] for item in items.values()]),
+        name="must_be_allocated_constrs" if (names) else ""
+    )
+
+    # Area of the items allocated on each bin
+    areas_row = scipy.sparse.csr_matrix(
+        numpy.array([[items_areas[i] for i in items_ids]])
+    )
+    model.addConstr(
+        scipy.sparse.kron(bins_identity, areas_row, format="csr") @ x 
+        <= 
+        bin_area,
+        name="item_area_constr" if (names) else ""
+    )
+
+    # Symmetry cuts: z_{j-1} >= z_{j}
+    if (number_of_bins > 1):
+        model.addConstr(
+            z[:-1] >= z[1:],
+            name="symmetry_cut" if (names) else ""
+        )
+
+    # A bin is used only if an item is allocated to it
+    ones_row = scipy.sparse.csr_matrix(numpy.ones((1, number_of_placements)))
+    model.addConstr(
+        scipy.sparse.kron(bins_identity, ones_row, format="csr") @ x 
+        >= 
+        z,
+        name="standard_bin_not_used_constr" if (names) else ""
+    )
+
+    if (initial_solution is not None):
+        placement_position = {
+            placement : p 
+            for p, placement in enumerate(zip(items_ids, l_values, w_values))
+        }
+        x_start = numpy.zeros(number_of_bins * number_of_placements)
+        for j, placement in enumerate(initial_solution, start=1):
+            for key in placement:
+                # The point may not be a placement point of the model, then 
+                # Gurobi tries to repair the MIP start
+                if (key in placement_position):
+                    p = placement_position[key]
+                    x_start[(j-1) * number_of_placements + p] = 1
+        x.Start = x_start
+        z.Start = (
+            numpy.arange(1, number_of_bins+1) <= len(initial_solution)
+        ).astype(float)
+
+    # Arrays used to decode the solution
+    model._x_array = x
+    model._z_array = z
+    model._placements = placements
+
+    model._cb_total_time = 0
+    set_parameters(
         model, 
+        time_limit=time_limit, 
+        log_path=log_path, 
+        threads=threads
+    )
+
+    return model
+
+
+def create_subproblem(
+    j,
+    items, 
+    bin_height, 
+    bin_width, 
+    coverage, 
+    model_name,
+    time_limit,
+    env=None
+):
+    '''Create a subproblem model. If env is None, the default Gurobi environment is used.'''
+    model = Model(name=model_name, env=env)
+
+    # Points where the left bottom of the items of the bin can be placed
+    placement_points = create_placement_points(
+        items, 
         bin_width, 
         bin_height, 
-        j, 
+        coverage["placement_points"]
+    )
+
+    # Create variables
+    (
+        x_vars_names, 
+        x_vars_keys, 
         x_of_bin_vars_keys, 
-        x_vars, 
-        1, 
-        point_is_cutted 
+        x_of_item_vars_keys, 
+        x_vars
+    ) = create_x_j_vars(
+        model, 
+        items, 
+        bin_height, 
+        bin_width, 
+        j, 
+        placement_points
+    )
+    # Create objective function as 0, since it is an feasiblity problem
+    model.setObjective(
+        0,
+        sense=GRB.MINIMIZE
+    )
+
+    # Create constraints
+
+    # Overlapping: for each point (r,s), 
+    # \sum_{i,l,w}{a_{i,l,w,r,s} * x_{i,j,l,w}} <= 1. The coefficients are 
+    # added as a sparse matrix, since the template models have the 
+    # placements of all items
+    cells_matrix = create_cells_matrix(
+        coverage, 
+        tuple(
+            numpy.asarray(values, dtype=numpy.int64)
+            for values in zip(*[
+                (i, l, w) for i, c, l, w in x_of_bin_vars_keys
+            ])
+        ),
+        get_cells_points(placement_points)
+    )
+    model.addMConstr(
+        cells_matrix, 
+        [x_vars[key] for key in x_of_bin_vars_keys], 
+        GRB.LESS_EQUAL, 
+        numpy.ones(cells_matrix.shape[0]),
+        name="bin_overlapping_constr_" + str(j)
     )
 
     must_be_allocated_constrs = create_all_items_must_be_allocated_constr(
         model,
         items,
-        x_vars
+        x_vars,
+        x_of_item_vars_keys
     )
 
+    # subproblem variables, used to get the placement of the items
+    model._x_vars = x_vars
+    # variables of each item and allocation constraints, used to activate 
+    # the items of a template model (see solve_subproblem_on_template)
+    model._x_of_item_vars_keys = x_of_item_vars_keys
+    model._x_of_item_vars = {
+        i : [x_vars[key] for key in keys]
+        for i, keys in x_of_item_vars_keys.items()
+    }
+    model._must_be_allocated_constrs = must_be_allocated_constrs
+
     set_parameters(model, time_limit=time_limit, problem_type="subproblem")
     return model
 
@@ -783,13 +1840,26 @@ def create_master_problem(
     bin_width, 
     items_areas,
     bin_area,
-    point_is_cutted, 
+    coverage, 
     number_of_bins,
     model_name,
     log_path, 
-    time_limit
+    time_limit,
+    subproblem_cache_size=10000,
+    subproblem_workers=1,
+    subproblem_heuristics=True,
+    subproblem_filters=True,
+    subproblem_backend="mip",
+    cut_strengthening=True,
+    cut_strengthening_time_limit=1,
+    initial_solution=None,
+    lower_bound=0,
+    threads=0
 ):
-    '''Create a Benders master model'''
+    '''Create a Benders master model. If initial_solution (list with the placement [(i,l,w), ...] of each bin) is given, it is used as MIP start. The first lower_bound bins are fixed as used. The master and the subproblems solved on the callback thread use at most threads threads (0 to let Gurobi choose). Raises a ValueError if the bitboard backend is used on a bin larger than it solves, since the errors of the callback do not stop the run.'''
+    if (subproblem_backend == "bitboard"):
+        check_bin_points(bin_height, bin_width)
+
     model = Model(name=model_name)
     
 
@@ -798,6 +1868,7 @@ def create_master_problem(
         model, number_of_bins
     )
     b_vars_names, b_vars = create_b_vars(model, items, number_of_bins)
+    y_vars_names, y_vars = create_y_vars(model, items, number_of_bins)
 
     # Create objective function as sum_{j \in P}{j * z_{j}}
     model.setObjective(
@@ -837,6 +1908,14 @@ def create_master_problem(
         z_vars
     )
 
+    copies_constr = create_copies_constr(
+        model,
+        items,
+        number_of_bins,
+        b_vars,
+        y_vars
+    )
+
     # Create params and variables used on callback
 
     # problem params
@@ -845,25 +1924,78 @@ def create_master_problem(
     model._items = items
     model._bin_height = bin_height
     model._bin_width = bin_width
-    model._point_is_cutted = point_is_cutted
+    model._coverage = coverage
+    model._subproblem_params = {
+        # use the packing heuristics before the subproblem model
+        "heuristics": subproblem_heuristics,
+        # use the infeasibility filters before the subproblem model
+        "filters": subproblem_filters,
+        # exact method used to solve the subproblems (see SUBPROBLEM_BACKENDS)
+        "backend": subproblem_backend,
+        # reduce the items of an infeasible subproblem before the cut
+        "cut_strengthening": cut_strengthening,
+        # time limit of each subproblem solved to reduce the items
+        "cut_strengthening_time_limit": cut_strengthening_time_limit,
+    }
+    # results of the subproblems already solved
+    model._subproblem_cache = create_subproblem_cache(subproblem_cache_size)
+    # template models of the subproblems solved on the callback thread
+    model._subproblem_manager = create_subproblem_manager(
+        items, 
+        bin_height, 
+        bin_width, 
+        coverage,
+        threads
+    )
+    # pool of workers to solve the subproblems in parallel (None if serial)
+    model._subproblem_pool = create_subproblem_pool(
+        subproblem_workers, 
+        items, 
+        bin_height, 
+        bin_width, 
+        coverage
+    )
 
     # master variables
     model._b_vars = b_vars
+    model._y_vars = y_vars
     model._z_vars = z_vars
 
-    # Lazy constraints set
-    model._lazy_set = set()
+    # Pool of the items of the lazy constraints
+    model._cut_pool = create_cut_pool()
+
+    fix_used_bins(z_vars, lower_bound)
+
+    if (initial_solution is not None):
+        set_master_mip_start(
+            model, 
+            b_vars, 
+            y_vars, 
+            z_vars, 
+            initial_solution
+        )
+        store_initial_solution_on_cache(
+            model._subproblem_cache, 
+            items, 
+            initial_solution
+        )
     # total time spent on callback
     model._cb_total_time = 0
+    # time spent on callback solving subproblems (including the subproblems 
+    # solved to strengthen the cuts)
+    model._subproblems_time = 0
 
     model._subproblems_incomplete = False
-    model._x_vars = {}
+    # placements {j : [(i,l,w), ...]} of the last solution accepted on the 
+    # callback
+    model._solution_placements = {}
 
     set_parameters(
         model, 
         time_limit=time_limit, 
         log_path=log_path,
-        problem_type="master_problem"
+        problem_type="master_problem",
+        threads=threads
     )
 
     return model
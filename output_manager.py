@@ -1,79 +1,213 @@
 import os
-import numpy
-from matplotlib import pyplot as plt
+import concurrent.futures
+
+
+# Backends used to draw the bins of a solution: "matplotlib" (png drawn with
+# one collection of rectangles per bin), "svg" (svg written directly, without
+# matplotlib) or "none" (the solution is not drawn)
+RENDER_BACKENDS = {"matplotlib", "svg", "none"}
+
+# Size (inches) of the largest dimension of the figure of a bin
+FIGURE_SIZE = 8
+
+# Size (pixels) of the largest dimension of the svg of a bin
+SVG_SIZE = 800
+
+
+def get_figures_path(output_directory):
+    '''Returns the path of the folder of the figures, creating it if it does not exists'''
+    figures_path = os.path.join(output_directory, "out_figures")
+    if (not os.path.exists(figures_path)):
+        os.makedirs(figures_path, exist_ok=True)
+    return figures_path
+
+
+def get_rectangles(items, x, y):
+    '''Returns the list of rectangles (item_id, l, w, width, height) of the items placed on a bin'''
+    return [
+        (
+            items[i]["id"],
+            x[items[i]["id"]],
+            y[items[i]["id"]],
+            items[i]["width"],
+            items[i]["height"]
+        )
+        for i in items.keys()
+    ]
+
+
+def get_label_size(width, height, max_width, max_height, figure_size):
+    '''Returns the font size (points) of the label of an item, proportional to its smallest dimension on the figure'''
+    points_per_unit = figure_size * 72 / max(max_width, max_height)
+    return max(4, min(20, 0.4 * min(width, height) * points_per_unit))
 
 
 def draw_solution(
-    items, 
-    items_ids_mapping, 
-    x, 
-    y, 
-    max_width, 
-    max_height, 
+    items,
+    items_ids_mapping,
+    x,
+    y,
+    max_width,
+    max_height,
     output_directory,
     bin_id,
-    prefix
+    prefix,
+    backend="matplotlib"
 ):
-    '''Plot the solution by drawing the items on the bins'''
+    '''Plot the solution by drawing the items on the bins, using a backend of RENDER_BACKENDS'''
+    if (backend == "none" or len(x) == 0):
+        return
+
+    figures_path = get_figures_path(output_directory)
+    rectangles = get_rectangles(items, x, y)
+
+    if (backend == "svg"):
+        file_path = os.path.join(figures_path, prefix + str(bin_id) + ".svg")
+        write_svg(
+            rectangles,
+            items_ids_mapping,
+            max_width,
+            max_height,
+            file_path
+        )
+    else:
+        file_path = os.path.join(figures_path, prefix + str(bin_id) + ".png")
+        write_png(
+            rectangles,
+            items_ids_mapping,
+            max_width,
+            max_height,
+            file_path
+        )
 
-    figures_path = file_path = os.path.join(
-        output_directory, 
-        "out_figures"
+
+def write_png(rectangles, items_ids_mapping, max_width, max_height, file_path):
+    '''Draw the rectangles of a bin as one collection on a figure of fixed size. The figure is created without pyplot, so the bins can be drawn in parallel.'''
+    # matplotlib is only needed if this backend is used
+    from matplotlib.figure import Figure
+    from matplotlib.collections import PolyCollection
+
+    scale = FIGURE_SIZE / max(max_width, max_height)
+    figure = Figure(
+        figsize=(max(2, max_width * scale), max(2, max_height * scale))
     )
+    ax = figure.subplots()
+    ax.set_aspect("equal")
+    ax.set_xlim(0, max_width)
+    ax.set_ylim(0, max_height)
+    ax.grid(True)
+
+    ax.add_collection(PolyCollection(
+        [
+            [(l, w), (l + width, w), (l + width, w + height), (l, w + height)]
+            for item_id, l, w, width, height in rectangles
+        ],
+        facecolors="gray",
+        edgecolors="black",
+        linewidths=2,
+        alpha=0.7
+    ))
+
+    for item_id, l, w, width, height in rectangles:
+        ax.text(
+            l + width/2,
+            w + height/2,
+            items_ids_mapping[item_id],
+            size=get_label_size(
+                width,
+                height,
+                max_width,
+                max_height,
+                FIGURE_SIZE
+            ),
+            color="black",
+            horizontalalignment="center",
+            verticalalignment="center"
+        )
+
+    figure.savefig(file_path)
 
-    if (not os.path.exists(figures_path)):
-        os.mkdir(figures_path)
-    
-    if (len(x) > 0):
-        plt.axis('equal')
-
-        figure, ax = plt.subplots()
-
-        figure.set_figwidth(max_width)
-        figure.set_figheight(max_height)
-        ax.grid(True)
-
-        ax.set_xticks(range(max_width+1))
-        ax.set_yticks(range(max_height+1))
-
-        for i in items.keys():
-            item_id = items[i]["id"]
-            
-            axis_x = [
-                x[item_id], x[item_id] + items[i]["width"],  
-                x[item_id] + items[i]["width"], x[item_id], x[item_id]
-            ]
-            
-            axis_y = [
-                y[item_id], y[item_id], y[item_id] + items[i]["height"], 
-                y[item_id] + items[i]["height"], y[item_id]
-            ]
-
-            axis_x = numpy.array(axis_x)
-            axis_y = numpy.array(axis_y)
-
-            plt.xlim(0, max_width)
-            plt.ylim(0, max_height)
-
-            plt.plot(axis_x, axis_y, linewidth=2, color="black")
-            plt.fill(axis_x, axis_y, alpha=0.7, color="gray")
-                
-            plt.text(
-                x[item_id] + (items[i]["width"]/2) - (items[i]["width"]/50), 
-                y[item_id] + (items[i]["height"]/2) - (items[i]["height"]/50), 
-                items_ids_mapping[item_id], 
-                size=20, 
-                color='black'
-            )
 
-        
-        file_path = os.path.join(
-            figures_path,
-            prefix + str(bin_id) + ".png"
+def write_svg(rectangles, items_ids_mapping, max_width, max_height, file_path):
+    '''Write the rectangles of a bin on a svg file. The coordinates of the svg are the coordinates of the bin, with the y axis flipped.'''
+    scale = SVG_SIZE / max(max_width, max_height)
+    lines = [
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        + f'width="{max_width * scale:g}" height="{max_height * scale:g}" '
+        + f'viewBox="0 0 {max_width} {max_height}">',
+        f'<rect width="{max_width}" height="{max_height}" fill="white" '
+        + 'stroke="black" vector-effect="non-scaling-stroke"/>'
+    ]
+    for item_id, l, w, width, height in rectangles:
+        top = max_height - w - height
+        font_size = 0.4 * min(width, height)
+        lines.append(
+            f'<rect x="{l}" y="{top}" width="{width}" height="{height}" '
+            + 'fill="gray" fill-opacity="0.7" stroke="black" '
+            + 'stroke-width="2" vector-effect="non-scaling-stroke"/>'
         )
+        lines.append(
+            f'<text x="{l + width/2:g}" y="{top + height/2:g}" '
+            + f'font-size="{font_size:g}" text-anchor="middle" '
+            + f'dominant-baseline="central">{items_ids_mapping[item_id]}'
+            + '</text>'
+        )
+    lines.append("</svg>")
+
+    with open(file_path, "w") as output:
+        output.write("\n".join(lines) + "\n")
+
+
+def draw_solutions(
+    bins,
+    items_ids_mapping,
+    max_width,
+    max_height,
+    output_directory,
+    prefix,
+    backend="matplotlib",
+    workers=1
+):
+    '''Draw the bins of a solution. bins is a list of tuples (bin_id, items, x, y) with the arguments of draw_solution of each bin. If workers > 1, the bins are drawn in parallel by processes.'''
+    if (backend == "none"):
+        return
 
-        plt.savefig(file_path)
-        plt.close()
-        plt.clf()
+    if (workers <= 1 or len(bins) <= 1):
+        for bin_id, items, x, y in bins:
+            draw_solution(
+                items,
+                items_ids_mapping,
+                x,
+                y,
+                max_width,
+                max_height,
+                output_directory,
+                bin_id,
+                prefix,
+                backend
+            )
+        return
 
-    return
\ No newline at end of file
+    # The folder is created before the workers write on it
+    get_figures_path(output_directory)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(workers, len(bins))
+    ) as executor:
+        futures = [
+            executor.submit(
+                draw_solution,
+                items,
+                items_ids_mapping,
+                x,
+                y,
+                max_width,
+                max_height,
+                output_directory,
+                bin_id,
+                prefix,
+                backend
+            )
+            for bin_id, items, x, y in bins
+        ]
+        for future in futures:
+            future.result()
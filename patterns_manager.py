@@ -0,0 +1,119 @@
+import bisect
+
+
+# Methods to choose the points (l,w) where the left bottom of an item can be
+# placed. "grid": every integer point. "normal_patterns": the sums of the
+# dimensions of the other items (Herz, Christofides and Whitlock).
+# "meet_in_the_middle": the meet-in-the-middle patterns of Cote and Iori, a
+# reduction of the normal patterns
+PLACEMENT_POINTS_METHODS = {"grid", "normal_patterns", "meet_in_the_middle"}
+
+
+def calculate_subset_sums(sizes, capacity):
+    '''Returns the sorted list of the sums <= capacity of the subsets of the sizes. sizes is a dictionary {size : number of copies}. The reachable sums are stored as the bits of an integer.'''
+    mask = (1 << (capacity + 1)) - 1
+    reachable = 1
+    for size, copies in sizes.items():
+        for k in range(copies):
+            new_reachable = (reachable | (reachable << size)) & mask
+            # If no sum was added, then the next copies add no sum either
+            if (new_reachable == reachable):
+                break
+            reachable = new_reachable
+    return [p for p in range(capacity + 1) if ((reachable >> p) & 1)]
+
+
+def get_sizes(items, dimension):
+    '''Returns a dictionary {size : number of copies} of a dimension ("width" or "height") of the items'''
+    sizes = {}
+    for item in items.values():
+        sizes[item[dimension]] = sizes.get(item[dimension], 0) + item["demand"]
+    return sizes
+
+
+def calculate_normal_patterns(items, capacity, dimension):
+    '''Returns a dictionary {i : points} with the normal patterns of each item on a dimension, the sums of the sizes of the other copies that leave room for the item'''
+    sizes = get_sizes(items, dimension)
+    points = {}
+    for i, item in items.items():
+        # One copy of the item is not on its left (or below it)
+        other_sizes = dict(sizes)
+        other_sizes[item[dimension]] -= 1
+        points[i] = calculate_subset_sums(
+            other_sizes,
+            capacity - item[dimension]
+        )
+    return points
+
+
+def calculate_meet_in_the_middle_points(items, capacity, dimension):
+    '''Returns a dictionary {i : points} with the meet-in-the-middle patterns of each item on a dimension. For a threshold t, the items on the left of t are pushed to the left and the others are pushed to the right, so the points of item i are the normal patterns p < t and the points capacity - size - p >= t. The threshold with the least points is used.'''
+    normal_patterns = calculate_normal_patterns(items, capacity, dimension)
+    # Points of each item pushed to the right
+    right_points = {
+        i : sorted(
+            capacity - items[i][dimension] - p
+            for p in normal_patterns[i]
+        )
+        for i in items.keys()
+    }
+
+    def count_points(t):
+        return sum(
+            bisect.bisect_left(normal_patterns[i], t)
+            + len(right_points[i])
+            - bisect.bisect_left(right_points[i], t)
+            for i in items.keys()
+        )
+
+    threshold = min(range(1, capacity + 1), key=count_points, default=1)
+    return {
+        i : sorted(
+            set(normal_patterns[i][
+                :bisect.bisect_left(normal_patterns[i], threshold)
+            ])
+            | set(right_points[i][
+                bisect.bisect_left(right_points[i], threshold):
+            ])
+        )
+        for i in items.keys()
+    }
+
+
+def calculate_grid_points(items, capacity, dimension):
+    '''Returns a dictionary {i : points} with every integer point that leaves room for each item on a dimension'''
+    return {
+        i : list(range(capacity - item[dimension] + 1))
+        for i, item in items.items()
+    }
+
+
+def create_placement_points(items, bin_width, bin_height, method="grid"):
+    '''Returns the points where the left bottom of each item can be placed, following a method of PLACEMENT_POINTS_METHODS. Every method keeps an optimal packing.
+
+    The placement points dictionary is structured as follow:
+    - placement_points["x"]: dictionary {i : sorted list of the l values of item i}
+    - placement_points["y"]: dictionary {i : sorted list of the w values of item i}
+    '''
+    if (method == "normal_patterns"):
+        calculate_points = calculate_normal_patterns
+    elif (method == "meet_in_the_middle"):
+        calculate_points = calculate_meet_in_the_middle_points
+    else:
+        calculate_points = calculate_grid_points
+
+    return {
+        "x": calculate_points(items, bin_width, "width"),
+        "y": calculate_points(items, bin_height, "height")
+    }
+
+
+def get_cells_points(placement_points):
+    '''Returns the sorted lists (x points, y points) of the coordinates of the placement points of all items. The overlapping constraints are only needed on the points (r,s) of these coordinates, since two overlapping items cut the point (max(l1,l2), max(w1,w2)).'''
+    x_points = set()
+    for points in placement_points["x"].values():
+        x_points.update(points)
+    y_points = set()
+    for points in placement_points["y"].values():
+        y_points.update(points)
+    return (sorted(x_points), sorted(y_points))
@@ -0,0 +1,77 @@
+import math
+from patterns_manager import calculate_subset_sums, get_sizes
+
+
+def get_max_subset_sum(sizes, capacity):
+    '''Returns the largest sum <= capacity of a subset of the sizes, a dictionary {size : number of copies}'''
+    return calculate_subset_sums(sizes, capacity)[-1]
+
+
+def trim_bin(items, capacity, dimension):
+    '''Returns the capacity of the bin on a dimension reduced to the largest sum of the sizes of the items that fits on it. The items on any line of the bin are a subset of the items, so the remaining space is never used.'''
+    return get_max_subset_sum(get_sizes(items, dimension), capacity)
+
+
+def enlarge_items(items, capacity, dimension):
+    '''Returns the items with the size on a dimension enlarged to capacity minus the largest sum of the sizes of the other items that fits beside the item. The space between the item and the items beside it is never used by another item. The items are enlarged one at a time, so each enlargement is valid on the instance with the previous ones. The items with demand > 1 are not enlarged, since their copies can not be enlarged at the same time.'''
+    enlarged_items = dict(items)
+    for i in items.keys():
+        size = enlarged_items[i][dimension]
+        if (size > capacity or enlarged_items[i]["demand"] > 1):
+            continue
+        other_sizes = get_sizes(enlarged_items, dimension)
+        other_sizes[size] -= 1
+        new_size = capacity - get_max_subset_sum(other_sizes, capacity - size)
+        if (new_size > size):
+            enlarged_items[i] = enlarged_items[i] | {dimension : new_size}
+    return enlarged_items
+
+
+def scale_items(items, capacity, dimension):
+    '''Returns (items, capacity, scale), with the sizes of the items on a dimension and the capacity divided by their greatest common divisor scale'''
+    scale = math.gcd(capacity, *(item[dimension] for item in items.values()))
+    if (scale <= 1):
+        return (items, capacity, 1)
+    scaled_items = {
+        i : item | {dimension : item[dimension] // scale}
+        for i, item in items.items()
+    }
+    return (scaled_items, capacity // scale, scale)
+
+
+def preprocess_instance(instance_data):
+    '''Returns a copy of the instance data with an equivalent instance on a smaller grid. On each dimension, the bin is trimmed, the items are enlarged and the bin is trimmed again, and then the sizes are divided by their greatest common divisor. The positions of a solution of the new instance are converted with restore_placements.
+
+    The following keys are added to the instance_data dictionary:
+    - instance_data["width_scale"]: value that multiplies the l positions of the new instance
+    - instance_data["height_scale"]: value that multiplies the w positions of the new instance
+    '''
+    instance_data = dict(instance_data)
+    items = instance_data["items"]
+    for dimension in ("width", "height"):
+        capacity = instance_data[dimension]
+        # The instance has no solution if an item is larger than the bin
+        if (any(item[dimension] > capacity for item in items.values())):
+            instance_data[dimension + "_scale"] = 1
+            continue
+        capacity = trim_bin(items, capacity, dimension)
+        items = enlarge_items(items, capacity, dimension)
+        capacity = trim_bin(items, capacity, dimension)
+        items, capacity, scale = scale_items(items, capacity, dimension)
+        instance_data[dimension] = capacity
+        instance_data[dimension + "_scale"] = scale
+    instance_data["items"] = items
+    return instance_data
+
+
+def restore_placements(placements, instance_data):
+    '''Returns the placements {j : [(i,l,w), ...]} of a solution of the preprocessed instance with the positions converted to the original instance'''
+    width_scale = instance_data.get("width_scale", 1)
+    height_scale = instance_data.get("height_scale", 1)
+    return {
+        j : [
+            (i, l * width_scale, w * height_scale)
+            for i, l, w in placement
+        ]
+        for j, placement in placements.items()
+    }
@@ -1,9 +1,32 @@
 import sys
 import os
-import gc
+import time
 import signal
 import multiprocessing
-from main import run
+import multiprocessing.connection
+from main import run, DEFAULT_PARAMETERS, calculate_items_areas
+from main import calculate_number_of_bins
+from input_manager import read
+from preprocessing_manager import preprocess_instance
+from patterns_manager import create_placement_points, get_cells_points
+from jobs_manager import get_method_fingerprint, create_job_key
+from jobs_manager import job_is_finished, write_job_status
+
+
+# Solution methods of the experiments: (code, prefix)
+METHODS = [(0, "standard"), (1, "benders")]
+
+# Memory (bytes) used by a process before the models are created
+BASE_MEMORY = 300 * 1024**2
+
+# Estimated memory (bytes) used by Gurobi for each variable and for each
+# nonzero of the overlapping constraints
+VARIABLE_MEMORY = 250
+NONZERO_MEMORY = 40
+
+# Time (seconds) given to a job after the time limit of the models, to build 
+# the models and write the solution. After it, the job is terminated
+JOB_TIMEOUT_GRACE = 600
 
 def get_input_files(input_dir):
     '''Get the input files from input dir'''
@@ -12,49 +35,255 @@ def get_input_files(input_dir):
         item_path = os.path.join(input_dir, item)
         if (os.path.isfile(item_path)):
             input_files.append(item_path)
-    
+
     input_files = sorted(input_files)
     return input_files
-            
-
-def run_model(input_files, output_dir, code, prefix=""):
-    '''Run the model for all input files and save on output direcotry. The results will be saved on an output directory with 
-    name = prefix + basename(input_file)'''
-    i = 0
-    for input_file in input_files:
-        
-        file_base_name = os.path.basename(input_file).split(".")[0]
-        output_local = os.path.join(output_dir, prefix + "_" + file_base_name)
-        args = (input_file, output_local, code)
-        
-        # Create a new process to avoid SIGKILL 
-        # if gurobi have out of memory  error
-        p = multiprocessing.Process(target=run, args=(args,))
-        p.start()
-        p.join()
-        print(p)
-
-        if (p.exitcode != 0):
-            file_name = os.path.join(output_local, "error.log")
-            with open(file_name, "w") as out_err:
-                out_err.write("Processo morto. Provavelmente memória estourou.")
-
-        gc.collect()
-        i += 1
+
+
+def get_available_memory():
+    '''Returns the memory (bytes) available on the machine, read from /proc/meminfo. Returns None if it is not available.'''
+    try:
+        with open("/proc/meminfo", "r") as meminfo:
+            for line in meminfo:
+                if (line.startswith("MemAvailable:")):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def estimate_model_size(input_file, params=DEFAULT_PARAMETERS):
+    '''Returns a tuple (number of bins, variables, nonzeros) with the estimated size of one bin of the models of an instance. The placements of each item are given by the placement points of the models, and the nonzeros of each placement are the cells points covered by the item.'''
+    instance_data = read(input_file)
+    if (params["preprocessing"]):
+        instance_data = preprocess_instance(instance_data)
+    items = instance_data["items"]
+    bin_width = instance_data["width"]
+    bin_height = instance_data["height"]
+
+    number_of_bins = calculate_number_of_bins(
+        items,
+        calculate_items_areas(items),
+        bin_width * bin_height
+    )
+    placement_points = create_placement_points(
+        items,
+        bin_width,
+        bin_height,
+        params["placement_points"]
+    )
+    x_points, y_points = get_cells_points(placement_points)
+
+    variables = 0
+    nonzeros = 0
+    for i, item in items.items():
+        placements = (
+            len(placement_points["x"][i]) * len(placement_points["y"][i])
+        )
+        # Cells points covered by a placement of item i
+        cells = (
+            max(1, len(x_points) * item["width"] // max(1, bin_width))
+            * max(1, len(y_points) * item["height"] // max(1, bin_height))
+        )
+        variables += placements
+        nonzeros += placements * cells
+    return (number_of_bins, variables, nonzeros)
+
+
+def create_job(input_file, output_dir, code, prefix, params, key):
+    '''Returns a dictionary with the data of the job that runs a solution method on an instance.
+
+    The job dictionary is structured as follow:
+    - job["args"]: arguments of main.run
+    - job["output"]: output directory of the job
+    - job["key"]: key of the job (see jobs_manager.create_job_key)
+    - job["threads"]: number of threads used by the job
+    - job["memory"]: estimated memory (bytes) used by the job
+    - job["work"]: estimated work of the job, used to run the longest jobs first
+    '''
+    output_local = get_job_output(input_file, output_dir, prefix)
+
+    number_of_bins, variables, nonzeros = estimate_model_size(
+        input_file,
+        params
+    )
+    bin_memory = VARIABLE_MEMORY * variables + NONZERO_MEMORY * nonzeros
+    threads = max(1, params["threads"])
+    if (code == 1):
+        # Each worker of the subproblems has its own subproblem model of
+        # one bin
+        workers = max(1, params["subproblem_workers"])
+        memory = BASE_MEMORY + bin_memory * (workers + 1)
+        threads = max(threads, params["subproblem_workers"])
+    else:
+        memory = BASE_MEMORY + bin_memory * number_of_bins
+
+    return {
+        "args": (input_file, output_local, code),
+        "output": output_local,
+        "key": key,
+        "threads": threads,
+        "memory": memory,
+        "work": number_of_bins * nonzeros
+    }
+
+
+def get_job_output(input_file, output_dir, prefix):
+    '''Returns the output directory of a job, named prefix + basename(input_file)'''
+    file_base_name = os.path.basename(input_file).split(".")[0]
+    return os.path.join(output_dir, prefix + "_" + file_base_name)
+
+
+def create_jobs(input_files, output_dir, params):
+    '''Returns the jobs of all solution methods for all input files, ordered by the longest first. The jobs already finished with the same key are skipped.'''
+    jobs = []
+    for code, prefix in METHODS:
+        method_fingerprint = get_method_fingerprint(code)
+        for input_file in input_files:
+            key = create_job_key(input_file, code, params, method_fingerprint)
+            output_local = get_job_output(input_file, output_dir, prefix)
+            if (job_is_finished(output_local, key)):
+                print("Skipping finished job", output_local)
+                continue
+            jobs.append(
+                create_job(input_file, output_dir, code, prefix, params, key)
+            )
+    return sorted(jobs, key=lambda job: job["work"], reverse=True)
+
+
+def job_fits(job, running_jobs, max_threads, max_memory):
+    '''True, if the job can start with the threads and the memory left by the running jobs. A job always fits if no job is running.'''
+    if (len(running_jobs) == 0):
+        return True
+    used_threads = sum(running["threads"] for running in running_jobs)
+    used_memory = sum(running["memory"] for running in running_jobs)
+    return (
+        used_threads + job["threads"] <= max_threads
+        and used_memory + job["memory"] <= max_memory
+    )
+
+
+def finish_job(process, job, timed_out=False):
+    '''Join the process of a finished job and store its status. If the job was killed or timed out, write an error log. The killed and the timed out jobs are run again on the next sweep.'''
+    process.join()
+    print(process, job["args"][0])
+
+    if (timed_out):
+        os.makedirs(job["output"], exist_ok=True)
+        file_name = os.path.join(job["output"], "error.log")
+        with open(file_name, "w") as out_err:
+            out_err.write("Processo terminado. Tempo limite excedido.")
+        write_job_status(
+            job["output"], 
+            job["key"], 
+            "timed_out", 
+            process.exitcode
+        )
+    elif (process.exitcode != 0):
+        os.makedirs(job["output"], exist_ok=True)
+        file_name = os.path.join(job["output"], "error.log")
+        with open(file_name, "w") as out_err:
+            out_err.write("Processo morto. Provavelmente memória estourou.")
+        write_job_status(job["output"], job["key"], "killed", process.exitcode)
+    else:
+        write_job_status(job["output"], job["key"], "finished", 0)
+
+
+def select_jobs_to_start(pending_jobs, running_jobs, max_threads, max_memory):
+    '''Returns the pending jobs that can start, following their order. The first job that does not fit reserves its threads and memory, so the next jobs only start if they fit with the running jobs and the reserved job. Then the resources freed by the running jobs are held for the reserved job, and it is not delayed by smaller jobs.'''
+    jobs_to_start = []
+    reserved_jobs = []
+    for job in pending_jobs:
+        if (not job_fits(
+            job,
+            running_jobs + jobs_to_start + reserved_jobs,
+            max_threads,
+            max_memory
+        )):
+            if (len(reserved_jobs) == 0):
+                reserved_jobs.append(job)
+            continue
+        jobs_to_start.append(job)
+    return jobs_to_start
+
+
+def terminate_process(process):
+    '''Terminate a process, killing it if it does not stop'''
+    process.terminate()
+    process.join(10)
+    if (process.is_alive()):
+        process.kill()
+
+
+def run_jobs(jobs, max_threads, max_memory, params):
+    '''Run the jobs concurrently, each one on a new process. The jobs start on their order whenever the sum of the threads and of the estimated memory of the running jobs allows (see select_jobs_to_start). A job that is still running JOB_TIMEOUT_GRACE seconds after the time limit is terminated.'''
+    pending_jobs = list(jobs)
+    # Running jobs, indexed by the sentinel of their process
+    running = {}
+    # Time when each running job is terminated, indexed by the sentinel
+    deadlines = {}
+    while (len(pending_jobs) > 0 or len(running) > 0):
+        running_jobs = [running_job for _, running_job in running.values()]
+        for job in select_jobs_to_start(
+            pending_jobs,
+            running_jobs,
+            max_threads,
+            max_memory
+        ):
+            # Create a new process to avoid SIGKILL
+            # if gurobi have out of memory  error
+            process = multiprocessing.Process(
+                target=run,
+                args=(job["args"], params)
+            )
+            process.start()
+            running[process.sentinel] = (process, job)
+            deadlines[process.sentinel] = (
+                time.time() + params["time_limit"] + JOB_TIMEOUT_GRACE
+            )
+            pending_jobs.remove(job)
+
+        timeout = max(0, min(deadlines.values()) - time.time())
+        for sentinel in multiprocessing.connection.wait(
+            list(running.keys()), 
+            timeout
+        ):
+            process, job = running.pop(sentinel)
+            deadlines.pop(sentinel)
+            finish_job(process, job)
+
+        # Terminate the jobs that passed their deadline
+        for sentinel, deadline in list(deadlines.items()):
+            if (time.time() >= deadline):
+                process, job = running.pop(sentinel)
+                deadlines.pop(sentinel)
+                terminate_process(process)
+                finish_job(process, job, timed_out=True)
+
 
 if __name__=="__main__":
     if (len(sys.argv) < 3):
         print("Needs:")
         print(" 1. Inputs Directory")
         print(" 2. Outputs Directory")
+        print(" 3. (Optional, Default = number of cpus) Maximum number of threads of all jobs")
+        print(" 4. (Optional, Default = 1) Number of threads of each job")
+        print(" 5. (Optional, Default = available memory) Maximum memory (GB) of all jobs")
         exit(0)
 
     input_dir = sys.argv[1]
     output_dir = sys.argv[2]
+    max_threads = int(sys.argv[3]) if (len(sys.argv) >= 4) else os.cpu_count()
+    threads = int(sys.argv[4]) if (len(sys.argv) >= 5) else 1
+    if (len(sys.argv) >= 6):
+        max_memory = float(sys.argv[5]) * 1024**3
+    else:
+        max_memory = get_available_memory() or float("inf")
+
+    params = DEFAULT_PARAMETERS | {"threads": threads}
 
     input_files = get_input_files(input_dir)
+    jobs = create_jobs(input_files, output_dir, params)
 
-    # Run model for standard formulation
-    run_model(input_files, output_dir, 0, "standard")
-    # Run model for benders formulation
-    run_model(input_files, output_dir, 1, "benders")
\ No newline at end of file
+    # Run the standard and the benders formulations for all input files
+    run_jobs(jobs, max_threads, max_memory, params)
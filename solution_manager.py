@@ -0,0 +1,77 @@
+import json
+import struct
+
+
+# Header of each block of the binary dump of the variables: name of the
+# group of variables (8 bytes), number of keys of each variable and number of
+# variables of the block
+VARIABLES_BLOCK_HEADER = struct.Struct("<8sII")
+
+
+def create_compact_solution(placements):
+    '''Returns the compact data of the solution with the placements {j : [(i,l,w), ...]} of the used bins.
+
+    The compact solution dictionary is structured as follow:
+    - solution["used_bins"]: sorted list of the used bins j
+    - solution["placements"]: list [i, j, l, w] of the position (l,w) of each placed copy of item i on bin j
+    '''
+    return {
+        "used_bins": sorted(placements.keys()),
+        "placements": [
+            [i, j, l, w]
+            for j in sorted(placements.keys())
+            for i, l, w in placements[j]
+        ]
+    }
+
+
+def write_json(data, file_path):
+    '''Write a dictionary on a json file without indentation and spaces'''
+    with open(file_path, "w") as output:
+        json.dump(data, output, separators=(",", ":"))
+
+
+def write_variables_block(output, group, keys, values):
+    '''Write a block of variables on the binary dump. keys is an integer array with one row (key_1, ..., key_n) of each variable and values is the array of their values. The keys are written column by column as int32, followed by the values as float64.'''
+    # numpy is only needed if the variables are dumped
+    import numpy
+
+    keys = numpy.asarray(keys, dtype="<i4")
+    values = numpy.asarray(values, dtype="<f8")
+    if (len(values) == 0):
+        return
+    keys = keys.reshape(len(values), -1)
+    output.write(VARIABLES_BLOCK_HEADER.pack(
+        group.encode("ascii"),
+        keys.shape[1],
+        len(values)
+    ))
+    output.write(numpy.ascontiguousarray(keys.T).tobytes())
+    output.write(values.tobytes())
+
+
+def read_variables_dump(file_path):
+    '''Returns a dictionary {group : (keys, values)} with the variables of a binary dump (see write_variables_block). The blocks of each group are concatenated.'''
+    import numpy
+
+    blocks = {}
+    with open(file_path, "rb") as input_file:
+        while (True):
+            header = input_file.read(VARIABLES_BLOCK_HEADER.size)
+            if (len(header) < VARIABLES_BLOCK_HEADER.size):
+                break
+            group, number_of_keys, count = VARIABLES_BLOCK_HEADER.unpack(header)
+            group = group.rstrip(b"\0").decode("ascii")
+            keys = numpy.frombuffer(
+                input_file.read(4 * number_of_keys * count),
+                dtype="<i4"
+            ).reshape(number_of_keys, count).T
+            values = numpy.frombuffer(input_file.read(8 * count), dtype="<f8")
+            if (group not in blocks):
+                blocks[group] = ([], [])
+            blocks[group][0].append(keys)
+            blocks[group][1].append(values)
+    return {
+        group : (numpy.concatenate(keys), numpy.concatenate(values))
+        for group, (keys, values) in blocks.items()
+    }
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import subprocess
+
+
+# Budget (seconds) of the time spent importing the main module
+STARTUP_TIME_BUDGET = 0.15
+
+# Modules that must not be imported at startup. They are imported by the
+# phases that use them (solver and plotting)
+LAZY_MODULES = ["gurobipy", "numpy", "scipy", "matplotlib", "ortools"]
+
+
+def measure_import_time(module="main"):
+    '''Import a module on a new python process with -X importtime. Returns a tuple (total time, wall time, imports), where total time is the cumulative import time (seconds) of the module, wall time is the time (seconds) of the whole process and imports is a list of tuples (cumulative time, self time, name) of each imported module'''
+    s = time.time()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        capture_output=True,
+        text=True,
+        check=True,
+        # The module is imported from the directory of the repository
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    wall_time = time.time() - s
+
+    imports = []
+    total_time = 0
+    for line in process.stderr.splitlines():
+        if (not line.startswith("import time:") or "[us]" in line):
+            continue
+        self_time, cumulative_time, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        imports.append((int(cumulative_time) / 1e6, int(self_time) / 1e6, name))
+        if (name == module):
+            total_time = int(cumulative_time) / 1e6
+    return (total_time, wall_time, imports)
+
+
+def create_startup_report(module="main", top=10, budget=STARTUP_TIME_BUDGET):
+    '''Returns a dictionary with the startup time of a module and the slowest imports.
+
+    The startup report dictionary is structured as follow:
+    - report["module"]: imported module
+    - report["import_time"]: cumulative import time (seconds) of the module
+    - report["wall_time"]: time (seconds) of the python process that imports the module
+    - report["budget"]: budget (seconds) of the import time
+    - report["within_budget"]: True, if the import time is not larger than the budget
+    - report["lazy_modules_imported"]: modules of LAZY_MODULES imported at startup
+    - report["slowest_imports"]: list [name, cumulative time, self time] of the top slowest imports
+    '''
+    total_time, wall_time, imports = measure_import_time(module)
+    names = {name.strip() for _, _, name in imports}
+    return {
+        "module": module,
+        "import_time": total_time,
+        "wall_time": wall_time,
+        "budget": budget,
+        "within_budget": total_time <= budget,
+        "lazy_modules_imported": [
+            name for name in LAZY_MODULES if (name in names)
+        ],
+        "slowest_imports": [
+            [name.strip(), cumulative_time, self_time]
+            for cumulative_time, self_time, name in sorted(
+                imports,
+                reverse=True
+            )[:top]
+        ]
+    }
+
+
+def print_startup_report(report):
+    '''Print a startup report (see create_startup_report)'''
+    print(
+        "import", report["module"] + ":",
+        "%.3f s" % report["import_time"],
+        "(budget %.3f s," % report["budget"],
+        "process %.3f s)" % report["wall_time"]
+    )
+    for name, cumulative_time, self_time in report["slowest_imports"]:
+        print("  %8.3f s %8.3f s  %s" % (cumulative_time, self_time, name))
+    if (len(report["lazy_modules_imported"]) > 0):
+        print(
+            "lazy modules imported at startup:",
+            ", ".join(report["lazy_modules_imported"])
+        )
+
+
+if __name__ == "__main__":
+    # argv[1] (optional): module imported, default main
+    module = sys.argv[1] if (len(sys.argv) >= 2) else "main"
+    report = create_startup_report(module)
+    print_startup_report(report)
+    if (
+        not report["within_budget"]
+        or len(report["lazy_modules_imported"]) > 0
+    ):
+        sys.exit(1)